@@ -18,6 +18,7 @@
 
 # !REVISION HISTORY:
 # - 28th October 2023, J. G. de Mattos: Initial Version
+# - 19th October 2026: Memory-aware sizing of tasks per node and node count
 
 # !REMARKS:
 # - This script is part of the Group on Data Assimilation Development (GDAD) project
@@ -42,6 +43,8 @@ class ParallelProcessingInfo:
         max_cores_per_node (int): Maximum number of cores per node.
         mpi_tasks (int): Total number of MPI tasks.
         threads_per_mpi_task (int, optional): Number of threads per MPI task. If not provided, it will be calculated internally.
+        memory_per_node (int, optional): Usable memory per node, in MB.
+        memory_per_task (int, optional): Memory required by each MPI task, in MB.
 
     Attributes:
         max_cores_per_node (int): Maximum number of cores per node.
@@ -50,31 +53,52 @@ class ParallelProcessingInfo:
         tasks_per_node (int): Number of tasks per node.
         pes (int): Total number of processes.
         nodes (int): Number of nodes needed to accommodate the tasks.
+        memory_per_node (int): Usable memory per node, in MB (None if unknown).
+        memory_per_task (int): Memory required by each MPI task, in MB (None if unknown).
+        memory_request (int): Memory to request per node, in MB (None if the memory model is not in use).
 
     Methods:
         calculate_tasks_per_node(): Calculate the number of tasks per node based on the number of threads per task.
         calculate_pes(): Calculate the total number of processes based on the number of threads per task.
         calculate_nodes(): Calculate the number of nodes needed to accommodate the tasks.
         calculate_threads_per_mpi_task(): Calculate the number of threads per task based on the number of tasks per node.
+        calculate_memory_request(): Calculate the memory to request per node.
+
+    The number of tasks per node is the smaller of the core and memory limits, so
+    jobs whose tasks run out of memory before they run out of cores are spread over
+    more nodes instead of being killed by the out-of-memory handler.
     """
 
-    def __init__(self, max_cores_per_node, mpi_tasks, threads_per_mpi_task=None):
+    def __init__(self, max_cores_per_node, mpi_tasks, threads_per_mpi_task=None, memory_per_node=None, memory_per_task=None):
         self.max_cores_per_node = max_cores_per_node
         self.mpi_tasks = mpi_tasks
+        self.memory_per_node = memory_per_node
+        self.memory_per_task = memory_per_task
         self.threads_per_mpi_task = threads_per_mpi_task if threads_per_mpi_task is not None else self.calculate_threads_per_mpi_task()
 
         self.tasks_per_node = self.calculate_tasks_per_node()
         self.pes = self.calculate_pes()
         self.nodes = self.calculate_nodes()
+        self.memory_request = self.calculate_memory_request()
 
     def calculate_tasks_per_node(self):
         """
-        Calculate the number of tasks per node based on the number of threads per task.
+        Calculate the number of tasks per node based on the number of threads per task
+        and, when known, on the memory available per node and required per task.
 
         Returns:
             int: Number of tasks per node.
+
+        Raises:
+            ValueError: If a single task needs more memory than a node provides.
         """
-        return self.max_cores_per_node // self.threads_per_mpi_task
+        tasks_per_node = self.max_cores_per_node // self.threads_per_mpi_task
+        if self.memory_per_node and self.memory_per_task:
+            memory_tasks_per_node = self.memory_per_node // self.memory_per_task
+            if memory_tasks_per_node < 1:
+                raise ValueError(f'Memory per task ({self.memory_per_task} MB) exceeds memory per node ({self.memory_per_node} MB).')
+            tasks_per_node = min(tasks_per_node, memory_tasks_per_node)
+        return tasks_per_node
 
     def calculate_pes(self):
         """
@@ -103,6 +127,17 @@ class ParallelProcessingInfo:
         """
         return self.max_cores_per_node // self.tasks_per_node
 
+    def calculate_memory_request(self):
+        """
+        Calculate the memory to request per node from the tasks placed on it.
+
+        Returns:
+            int: Memory per node in MB, or None if the memory per task is not known.
+        """
+        if not self.memory_per_task:
+            return None
+        return self.tasks_per_node * self.memory_per_task
+
 
 #EOC
 #-----------------------------------------------------------------------------#
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------#
+#           Group on Data Assimilation Development - GDAD/CPTEC/INPE          #
+#-----------------------------------------------------------------------------#
+#BOP
+#
+# !SCRIPT: profiler.py
+#
+# !DESCRIPTION:
+# This Python script defines a class called "StageProfiler" for measuring the cost
+# of the stages of script generation (YAML parsing, argument parser construction,
+# directive merging, rendering and file writing). For each stage it records the
+# wall time, with time.perf_counter_ns, the net change in the number of allocated
+# memory blocks, with sys.getallocatedblocks, and the memory traced by tracemalloc:
+# the peak reached above the memory in use when the stage started, and the net
+# change left behind when it ended.
+
+# !CALLING SEQUENCE:
+# This script is intended to be used as a module. Profiling is enabled with the
+# "profiling" context manager; the stages of the package report to the active
+# profiler, and nothing is recorded outside the context.
+#
+# Example Usage:
+#   with profiling('profile.jsonl') as profiler:
+#       script, filename = generate_submission_script(config, args)
+#   print(profiler.report())
+#
+# The statistics of all the runs recorded in a report file are aggregated with:
+#   StageProfiler.load('profile.jsonl').report()
+
+# !REVISION HISTORY:
+# - 19th October 2026: Initial Version
+
+# !REMARKS:
+# - This script is part of the Group on Data Assimilation Development (GDAD) project
+#   at CPTEC/INPE.
+# - When no profiler is active, "profile_stage" returns a shared no-op context
+#   manager, so the instrumented code runs at practically full speed.
+# - Stages may be nested; the time and memory of a stage include those of the
+#   stages nested in it.
+# - Each run appends one line to the report file, so runs of a batch executing in
+#   parallel do not overwrite each other's statistics.
+
+#EOP
+#-----------------------------------------------------------------------------#
+#BOC
+
+import sys
+import json
+import time
+import functools
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# Profiler receiving the measurements of the instrumented stages, if any.
+_active_profiler = None
+_disabled = nullcontext()
+
+class StageProfiler:
+    """
+    Class for recording and aggregating the cost of named stages.
+
+    Attributes:
+        stages (dict): Statistics for each stage name, with the keys calls, total_ns,
+            min_ns, max_ns, net_blocks (sum of the net changes in allocated blocks),
+            peak_bytes (largest peak of a call) and net_bytes (sum of the net changes).
+            Byte statistics are zero when tracemalloc is not tracing.
+
+    Methods:
+        stage(name): Context manager measuring one execution of a stage.
+        record(name, elapsed_ns, peak_bytes, net_bytes, net_blocks): Add one measurement of a stage.
+        merge(report): Add the statistics of another report.
+        report(): Return the aggregated statistics as a dictionary.
+        save(file_path): Append the report of this run to a JSON Lines file.
+        load(file_path): Aggregate the reports of all the runs in a JSON Lines file.
+
+    Example Usage:
+        profiler = StageProfiler()
+        with profiler.stage("render"):
+            render()
+        print(profiler.report())
+    """
+
+    def __init__(self):
+        self.stages = {}
+        # Peak of traced memory seen by each open stage, innermost last.
+        self._peaks = []
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Measure one execution of a stage.
+
+        The tracemalloc peak is reset when a stage starts; the peak reached so far by the
+        enclosing stage is kept aside first and restored into it when the stage ends, so
+        nested stages do not hide the peaks of the stages around them.
+
+        Args:
+            name (str): Name of the stage.
+        """
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            start_bytes, peak = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self._peaks.append(start_bytes)
+        start_blocks = sys.getallocatedblocks()
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            elapsed_ns = time.perf_counter_ns() - start_ns
+            net_blocks = sys.getallocatedblocks() - start_blocks
+            peak_bytes = net_bytes = 0
+            if tracing:
+                end_bytes, peak = tracemalloc.get_traced_memory()
+                peak = max(self._peaks.pop(), peak)
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                peak_bytes, net_bytes = peak - start_bytes, end_bytes - start_bytes
+            self.record(name, elapsed_ns, peak_bytes, net_bytes, net_blocks)
+
+    def record(self, name, elapsed_ns, peak_bytes=0, net_bytes=0, net_blocks=0):
+        """
+        Add one measurement of a stage.
+
+        Args:
+            name (str): Name of the stage.
+            elapsed_ns (int): Wall time in nanoseconds.
+            peak_bytes (int, optional): Peak traced memory above the memory in use at the start of the stage.
+            net_bytes (int, optional): Change in traced memory between the start and the end of the stage.
+            net_blocks (int, optional): Change in the number of allocated memory blocks.
+        """
+        self.merge({name: {'calls': 1, 'total_ns': elapsed_ns, 'min_ns': elapsed_ns, 'max_ns': elapsed_ns,
+                           'net_blocks': net_blocks, 'peak_bytes': peak_bytes, 'net_bytes': net_bytes}})
+
+    def merge(self, report):
+        """
+        Add the statistics of another report, e.g. from another run of a batch.
+
+        Args:
+            report (dict): Statistics for each stage name, as returned by report().
+        """
+        for name, stats in report.items():
+            current = self.stages.get(name)
+            if current is None:
+                self.stages[name] = {key: stats.get(key, 0) for key in
+                                     ('calls', 'total_ns', 'min_ns', 'max_ns', 'net_blocks', 'peak_bytes', 'net_bytes')}
+                continue
+            current['calls'] += stats['calls']
+            current['total_ns'] += stats['total_ns']
+            current['min_ns'] = min(current['min_ns'], stats['min_ns'])
+            current['max_ns'] = max(current['max_ns'], stats['max_ns'])
+            current['net_blocks'] += stats.get('net_blocks', 0)
+            current['peak_bytes'] = max(current['peak_bytes'], stats['peak_bytes'])
+            current['net_bytes'] += stats['net_bytes']
+
+    def report(self):
+        """
+        Return the aggregated statistics.
+
+        Returns:
+            dict: Statistics for each stage name, including the mean wall time (mean_ns).
+        """
+        return {name: dict(stats, mean_ns=stats['total_ns'] // stats['calls'])
+                for name, stats in self.stages.items()}
+
+    def save(self, file_path):
+        """
+        Append the report of this run to a JSON Lines file.
+
+        The report is written as a single line with a single write to a file opened in
+        append mode, so concurrent runs of a batch add their lines without overwriting
+        each other. Use load() to aggregate them.
+
+        Args:
+            file_path (str): Path to the JSON Lines report.
+        """
+        line = json.dumps(self.report(), sort_keys=True) + "\n"
+        with open(file_path, 'a') as report_file:
+            report_file.write(line)
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        Aggregate the reports of all the runs in a JSON Lines file.
+
+        Args:
+            file_path (str): Path to the JSON Lines report.
+
+        Returns:
+            StageProfiler: A profiler holding the aggregated statistics.
+        """
+        profiler = cls()
+        with open(file_path, 'r') as report_file:
+            for line in report_file:
+                if line.strip():
+                    profiler.merge(json.loads(line))
+        return profiler
+
+@contextmanager
+def profiling(file_path=None, trace_memory=True):
+    """
+    Enable profiling of the package stages.
+
+    Args:
+        file_path (str, optional): JSON Lines file where the report is appended on exit.
+        trace_memory (bool, optional): Trace memory with tracemalloc. Defaults to True.
+
+    Yields:
+        StageProfiler: The profiler receiving the measurements.
+    """
+    global _active_profiler
+    previous = _active_profiler
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    _active_profiler = StageProfiler()
+    try:
+        yield _active_profiler
+    finally:
+        profiler, _active_profiler = _active_profiler, previous
+        if started_tracing:
+            tracemalloc.stop()
+        if file_path:
+            profiler.save(file_path)
+
+def profile_stage(name):
+    """
+    Measure a stage with the active profiler.
+
+    Args:
+        name (str): Name of the stage.
+
+    Returns:
+        A context manager measuring the stage, or a no-op one when profiling is disabled.
+    """
+    if _active_profiler is None:
+        return _disabled
+    return _active_profiler.stage(name)
+
+def profiled(name):
+    """
+    Decorator measuring every call of a function as a stage.
+
+    Args:
+        name (str): Name of the stage.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _active_profiler is None:
+                return function(*args, **kwargs)
+            with _active_profiler.stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+#EOC
+#-----------------------------------------------------------------------------#
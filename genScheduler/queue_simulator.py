@@ -0,0 +1,353 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------#
+#           Group on Data Assimilation Development - GDAD/CPTEC/INPE          #
+#-----------------------------------------------------------------------------#
+#BOP
+#
+# !SCRIPT: queue_simulator.py
+#
+# !DESCRIPTION:
+# This Python script defines a class called "QueueSimulator" for predicting when a
+# job would start on a cluster, given a snapshot of the queue and of the node state.
+# The snapshot is read from the text output of the scheduler commands (squeue and
+# sinfo for SLURM, qstat for PBS), and the scheduler is modelled as FIFO with
+# conservative backfill: every queued job, in queue order, is given the earliest
+# reservation that does not delay the jobs ahead of it.
+
+# !CALLING SEQUENCE:
+# This script is intended to be used as a module. Users can load a snapshot with
+# "QueueSimulator.from_slurm" or "QueueSimulator.from_pbs" and call "predict_start"
+# or "choose_layout" to score candidate job layouts.
+#
+# Example Usage:
+#   squeue --noheader -o "%i %T %D %l %L" -p batch > squeue.txt
+#   sinfo --noheader -o "%D %T" -p batch > sinfo.txt
+#
+#   simulator = QueueSimulator.from_slurm('squeue.txt', 'sinfo.txt')
+#   start = simulator.predict_start(nodes=4, walltime=3600)
+
+# !REVISION HISTORY:
+# - 19th October 2026: Initial Version
+
+# !REMARKS:
+# - This script is part of the Group on Data Assimilation Development (GDAD) project
+#   at CPTEC/INPE.
+# - Running jobs are assumed to use their nodes until their time limit, and queued
+#   jobs to run for their full requested wall clock limit, which is what the
+#   scheduler itself assumes when planning backfill.
+# - The queue is simulated once when the snapshot is loaded; each prediction is a
+#   single scan of the resulting free-node profile, so hundreds of candidate
+#   layouts can be scored in well under a second.
+
+#EOP
+#-----------------------------------------------------------------------------#
+#BOC
+
+import re
+import bisect
+
+def walltime_to_seconds(walltime, scheduler_type='SLURM'):
+    """
+    Convert a wall clock limit to seconds.
+
+    Args:
+        walltime (str or int): Wall clock limit. Both schedulers accept [[HH:]MM:]SS; SLURM also
+            accepts D-HH, D-HH:MM and D-HH:MM:SS.
+        scheduler_type (str, optional): Type of scheduler (PBS or SLURM), which decides the unit of
+            a bare number, given as an int or a string: minutes for SLURM, seconds for PBS.
+            Defaults to SLURM.
+
+    Returns:
+        int: Wall clock limit in seconds.
+
+    Raises:
+        ValueError: If the value cannot be interpreted as a wall clock limit.
+    """
+    match = re.fullmatch(r'(?:(\d+)-)?(\d+)(?::(\d+))?(?::(\d+))?', str(walltime).strip())
+    if not match or (match.group(1) is not None and scheduler_type == 'PBS'):
+        raise ValueError(f"Invalid wall clock limit: '{walltime}'.")
+
+    days, first, second, third = match.groups()
+    if third is not None:
+        hours, minutes, seconds = int(first), int(second), int(third)
+    elif days is not None:
+        hours, minutes, seconds = int(first), int(second or 0), 0
+    elif second is not None:
+        hours, minutes, seconds = 0, int(first), int(second)
+    elif scheduler_type == 'PBS':
+        hours, minutes, seconds = 0, 0, int(first)
+    else:
+        hours, minutes, seconds = 0, int(first), 0
+    return ((int(days or 0) * 24 + hours) * 60 + minutes) * 60 + seconds
+
+def seconds_to_walltime(seconds):
+    """
+    Convert a number of seconds to a HH:MM:SS wall clock limit.
+
+    Args:
+        seconds (int): Wall clock limit in seconds.
+
+    Returns:
+        str: Wall clock limit as HH:MM:SS.
+    """
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+class QueueSimulator:
+    """
+    Class for predicting job start times from a snapshot of a cluster queue.
+
+    Args:
+        total_nodes (int): Number of nodes available to jobs in the simulated partition.
+
+    Attributes:
+        total_nodes (int): Number of nodes available to jobs in the simulated partition.
+        running (list): (nodes, remaining seconds) of the running jobs.
+        pending (list): (nodes, wall clock limit in seconds) of the queued jobs, in queue order.
+
+    Methods:
+        add_running(nodes, remaining): Add a running job to the snapshot.
+        add_pending(nodes, walltime): Add a queued job to the end of the queue.
+        predict_start(nodes, walltime): Predict the start time of a job submitted now.
+        choose_layout(candidates): Choose the candidate layout with the earliest predicted completion.
+        from_slurm(squeue_file, sinfo_file, total_nodes): Create a simulator from SLURM snapshot files.
+        from_pbs(qstat_file, total_nodes): Create a simulator from a PBS snapshot file.
+
+    Example Usage:
+        simulator = QueueSimulator(total_nodes=100)
+        simulator.add_running(60, 1800)
+        simulator.add_pending(80, 3600)
+        start = simulator.predict_start(30, 7200)
+    """
+
+    def __init__(self, total_nodes):
+        self.total_nodes = total_nodes
+        self.running = []
+        self.pending = []
+        self._profile = None
+
+    def add_running(self, nodes, remaining):
+        """
+        Add a running job to the snapshot.
+
+        Args:
+            nodes (int): Number of nodes used by the job.
+            remaining (int): Seconds until the job reaches its time limit.
+        """
+        self.running.append((nodes, max(int(remaining), 0)))
+        self._profile = None
+
+    def add_pending(self, nodes, walltime):
+        """
+        Add a queued job to the end of the queue.
+
+        Args:
+            nodes (int): Number of nodes requested by the job.
+            walltime (int): Wall clock limit of the job, in seconds.
+        """
+        self.pending.append((nodes, max(int(walltime), 0)))
+        self._profile = None
+
+    def _build_profile(self):
+        """
+        Simulate the snapshot and build the free-node profile.
+
+        The profile is a pair of lists (times, free): free[i] nodes are available from
+        times[i] until times[i + 1], and free[-1] nodes from times[-1] onwards.
+
+        Returns:
+            tuple: The profile times and free node counts.
+        """
+        # Nodes are released as the running jobs reach their time limits.
+        releases = {}
+        busy = 0
+        for nodes, remaining in self.running:
+            busy += nodes
+            releases[remaining] = releases.get(remaining, 0) + nodes
+
+        times, free = [0], [self.total_nodes - busy]
+        for time in sorted(releases):
+            if time == 0:
+                free[0] += releases[time]
+            else:
+                times.append(time)
+                free.append(free[-1] + releases[time])
+
+        # Queued jobs are reserved in queue order at the earliest time they fit.
+        for nodes, walltime in self.pending:
+            if nodes > self.total_nodes:
+                continue
+            start = self._earliest_start(times, free, nodes, walltime)
+            self._reserve(times, free, start, start + walltime, nodes)
+
+        return times, free
+
+    @staticmethod
+    def _earliest_start(times, free, nodes, walltime):
+        """
+        Find the earliest time at which a job fits in a free-node profile.
+
+        Args:
+            times (list): Profile times.
+            free (list): Free nodes from each profile time onwards.
+            nodes (int): Number of nodes requested.
+            walltime (int): Wall clock limit in seconds.
+
+        Returns:
+            int: Earliest start time in seconds.
+        """
+        i = 0
+        while i < len(times):
+            start, j = times[i], i
+            while j < len(times) and times[j] < start + walltime:
+                if free[j] < nodes:
+                    break
+                j += 1
+            else:
+                return start
+            i = j + 1
+        return times[-1]
+
+    @staticmethod
+    def _reserve(times, free, start, end, nodes):
+        """
+        Remove nodes from a free-node profile between two times.
+
+        Args:
+            times (list): Profile times, updated in place.
+            free (list): Free nodes from each profile time onwards, updated in place.
+            start (int): Start of the reservation in seconds.
+            end (int): End of the reservation in seconds.
+            nodes (int): Number of nodes reserved.
+        """
+        for time in (start, end):
+            index = bisect.bisect_left(times, time)
+            if index == len(times) or times[index] != time:
+                times.insert(index, time)
+                free.insert(index, free[index - 1])
+
+        first = bisect.bisect_left(times, start)
+        last = bisect.bisect_left(times, end)
+        for index in range(first, last):
+            free[index] -= nodes
+
+    def predict_start(self, nodes, walltime):
+        """
+        Predict the start time of a job submitted now, behind every queued job.
+
+        Args:
+            nodes (int): Number of nodes requested.
+            walltime (int): Wall clock limit in seconds.
+
+        Returns:
+            int: Predicted wait in seconds, or None if the job can never fit.
+        """
+        if nodes > self.total_nodes:
+            return None
+        if self._profile is None:
+            self._profile = self._build_profile()
+        times, free = self._profile
+        return self._earliest_start(times, free, nodes, walltime)
+
+    def choose_layout(self, candidates):
+        """
+        Choose the candidate layout with the earliest predicted completion.
+
+        Args:
+            candidates (iterable): Pairs of (ParallelProcessingInfo, wall clock limit in seconds).
+
+        Returns:
+            tuple: (layout, walltime, start) of the best candidate, or None if none can run.
+            Ties are resolved in favour of the earliest candidate.
+        """
+        best, best_completion = None, None
+        for layout, walltime in candidates:
+            start = self.predict_start(layout.nodes, walltime)
+            if start is None:
+                continue
+            if best_completion is None or start + walltime < best_completion:
+                best, best_completion = (layout, walltime, start), start + walltime
+        return best
+
+    @classmethod
+    def from_slurm(cls, squeue_file, sinfo_file=None, total_nodes=None):
+        """
+        Create a simulator from SLURM snapshot files.
+
+        Args:
+            squeue_file (str): Output of 'squeue --noheader -o "%i %T %D %l %L"'.
+            sinfo_file (str, optional): Output of 'sinfo --noheader -o "%D %T"'.
+            total_nodes (int, optional): Number of nodes available to the partition, used when
+                no sinfo_file is given.
+
+        Returns:
+            QueueSimulator: A simulator loaded with the snapshot.
+
+        Nodes that are down, drained, failed or under maintenance are not counted.
+        Jobs without a usable time limit (e.g., UNLIMITED) are ignored.
+        """
+        if sinfo_file is not None:
+            total_nodes = 0
+            with open(sinfo_file, 'r') as file:
+                for line in file:
+                    fields = line.split()
+                    if len(fields) < 2 or not fields[0].isdigit():
+                        continue
+                    state = fields[1].lower()
+                    if not state.startswith(('down', 'drain', 'fail', 'maint', 'inval', 'unk', 'power', 'future')):
+                        total_nodes += int(fields[0])
+        elif total_nodes is None:
+            raise ValueError("Either sinfo_file or total_nodes must be given.")
+
+        simulator = cls(total_nodes)
+        with open(squeue_file, 'r') as file:
+            for line in file:
+                fields = line.split()
+                if len(fields) < 5 or not fields[2].isdigit():
+                    continue
+                state, nodes = fields[1].upper(), int(fields[2])
+                try:
+                    if state in ('RUNNING', 'R', 'COMPLETING', 'CG'):
+                        simulator.add_running(nodes, walltime_to_seconds(fields[4]))
+                    elif state in ('PENDING', 'PD'):
+                        simulator.add_pending(nodes, walltime_to_seconds(fields[3]))
+                except ValueError:
+                    continue
+        return simulator
+
+    @classmethod
+    def from_pbs(cls, qstat_file, total_nodes):
+        """
+        Create a simulator from a PBS snapshot file.
+
+        Args:
+            qstat_file (str): Output of 'qstat -a' for the target queue.
+            total_nodes (int): Number of nodes available to the queue.
+
+        Returns:
+            QueueSimulator: A simulator loaded with the snapshot.
+
+        The NDS, Req'd Time, S and Elap Time columns are read from the end of each
+        line, so job names and queue names containing spaces do not shift them.
+        """
+        simulator = cls(total_nodes)
+        with open(qstat_file, 'r') as file:
+            for line in file:
+                fields = line.split()
+                if len(fields) < 6 or not fields[-6].isdigit():
+                    continue
+                nodes, required, state, elapsed = int(fields[-6]), fields[-3], fields[-2], fields[-1]
+                try:
+                    walltime = walltime_to_seconds(f"{required}:00")
+                    if state == 'R':
+                        elapsed = walltime_to_seconds(f"{elapsed}:00") if elapsed != '--' else 0
+                        simulator.add_running(nodes, walltime - elapsed)
+                    elif state == 'Q':
+                        simulator.add_pending(nodes, walltime)
+                except ValueError:
+                    continue
+        return simulator
+
+#EOC
+#-----------------------------------------------------------------------------#
@@ -30,14 +30,35 @@
 
 import warnings
 import os
+import sys
 import argparse
 import yaml
 from datetime import datetime
 import re
+import math
+import functools
+from datetime import timedelta
 from .parallel_processing_info import ParallelProcessingInfo
 from .scheduler_directives import SchedulerDirectives
+from .queue_simulator import QueueSimulator, walltime_to_seconds, seconds_to_walltime
+from .profiler import profiled, profile_stage
 
-def parser():
+@profiled('parser.read_yaml')
+def read_directive_definitions(yaml_file_path):
+    """
+    Read the directive definitions used to build the command-line arguments.
+
+    Args:
+        yaml_file_path (str): Path to the directives YAML file.
+
+    Returns:
+        dict: Parsed content of the YAML file.
+    """
+    with open(yaml_file_path, 'r') as yaml_file:
+        return yaml.safe_load(yaml_file)
+
+@profiled('parser.build')
+def build_parser():
    # Determine the path to the package directory
     package_directory = os.path.dirname(os.path.abspath(__file__))  # Get the current script's
 
@@ -45,8 +66,7 @@ def parser():
     yaml_file_path = os.path.join(package_directory, 'data', 'directives.yaml')
 
     # Read the YAML configuration including the list of directives
-    with open(yaml_file_path, 'r') as yaml_file:
-        data = yaml.safe_load(yaml_file)
+    data = read_directive_definitions(yaml_file_path)
     
     # Merge the directive options from the YAML file with the existing directive definitions
     result = {}
@@ -68,12 +88,25 @@ def parser():
     # Initialize the argument parser
     parser = argparse.ArgumentParser(description='Generate customized submission scripts for PBS and SLURM schedulers.')
 
-    parser.add_argument("--machine", type=str,required=True, help="Machine name (e.g., XC50, EGEON)")
-    parser.add_argument("--scheduler", type=str, required=True, help="Script type (PBS or SLURM)")
+    parser.add_argument("--machine", type=str,required=True, help="Machine name (e.g., XC50, EGEON), or 'auto' for the machine with the best predicted turnaround")
+    parser.add_argument("--scheduler", type=str, required=False, help="Script type (PBS or SLURM); defaults to the 'scheduler' of the machine")
     parser.add_argument("--max-cores-per-node", type=int, required=False,help="Maximum number of cores per node")
     parser.add_argument("--mpi-tasks", type=int, required=True, help="Number of MPI Tasks")
     parser.add_argument("--threads-per-mpi-task", type=int, required=True, help="Number of cores per MPI task")
     parser.add_argument("--output", type=str, help="Specify the output filename for the generated content.")
+    parser.add_argument("--memory-per-node", type=str, required=False, help="Usable memory per node (e.g., 256G)")
+    parser.add_argument("--memory-per-task", type=str, required=False, help="Memory required by each MPI task (e.g., 4G)")
+    parser.add_argument("--checkpoint", action="store_true", help="Checkpoint and resubmit the job before the wall clock limit is reached")
+    parser.add_argument("--max-resubmissions", type=int, required=False, help="Maximum number of chained resubmissions in checkpoint mode")
+    parser.add_argument("--queue-snapshot", type=str, required=False, help="Saved squeue/qstat output used to choose the layout with the earliest predicted completion")
+    parser.add_argument("--nodes-snapshot", type=str, required=False, help="Saved sinfo output with the node states (SLURM)")
+    parser.add_argument("--cycle-start", type=str, required=False, help="First cycle date (YYYYMMDDHH); generates one script per cycle")
+    parser.add_argument("--cycle-end", type=str, required=False, help="Last cycle date (YYYYMMDDHH)")
+    parser.add_argument("--cycle-interval", type=int, default=6, help="Interval between cycles, in hours (default: 6)")
+    parser.add_argument("--cycle-dependency", type=str, nargs='?', const='submit_cycles.sh', help="Write a script submitting the cycles so that each one starts only after the previous one succeeded (default: submit_cycles.sh)")
+    parser.add_argument("--tuning-profile", type=str, required=False, help="Runtime tuning profile to apply (e.g., latency, bandwidth, io-heavy)")
+    parser.add_argument("--profile", type=str, nargs='?', const='genScheduler_profile.jsonl', help="Record the time and memory of each generation stage in a JSON Lines report (default: genScheduler_profile.jsonl)")
+    parser.add_argument("--layout-scales", type=float, nargs='+', default=[0.5, 1.0, 2.0], help="Scale factors applied to the MPI tasks to build candidate layouts")
 
 
     # Iterate through the merged directive definitions and add them as command-line arguments
@@ -85,14 +118,31 @@ def parser():
         arg_help = arg_options['description']
         parser.add_argument(arg_name,type=arg_type, required=arg_requ, help=arg_help)
     
+    return parser
+
+@profiled('parser')
+def parser():
+    """
+    Build the argument parser and parse the command-line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed command-line arguments.
+    """
+    argument_parser = build_parser()
+
     # Parse the command-line arguments
-    return  parser.parse_args()
+    with profile_stage('parser.parse_args'):
+        return  argument_parser.parse_args()
   
 
+@profiled('initialize_directives')
+@functools.lru_cache(maxsize=None)
 def initialize_directives():
     """
     Initializes and configures scheduler directives.
 
+    The directives are read once and shared by later calls, which must not modify them.
+
     Returns:
         SchedulerDirectives: An instance of the SchedulerDirectives class containing configured directives.
     """
@@ -108,7 +158,8 @@ def initialize_directives():
     yaml_file_path = os.path.join(package_directory, 'data', 'directives.yaml')
 
     # Load the directives from the YAML file
-    directives.load_directives_from_yaml(yaml_file_path)
+    with profile_stage('initialize_directives.read_yaml'):
+        directives.load_directives_from_yaml(yaml_file_path)
 
     return directives
 
@@ -129,6 +180,122 @@ def calculate_variables(max_cores_per_node, mpi_tasks, threads_per_mpi_task):
     nodes = (mpi_tasks + max_cores_per_node - 1) // max_cores_per_node
     return tasks_per_node, pes, nodes
 
+def parse_memory(value):
+    """
+    Convert a memory amount to megabytes.
+
+    Args:
+        value (int, float or str): Memory amount. Numbers are taken as MB; strings may carry a
+            K, M, G or T suffix (optionally followed by B), as in '4G', '512MB' or '1843200K'.
+
+    Returns:
+        int: Memory amount in MB, rounded up, or None if value is None.
+
+    Raises:
+        ValueError: If the value cannot be interpreted as a positive memory amount.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        megabytes = value
+    else:
+        match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*', str(value), re.IGNORECASE)
+        if not match:
+            raise ValueError(f"Invalid memory amount: '{value}'.")
+        factors = {'K': 1 / 1024, '': 1, 'M': 1, 'G': 1024, 'T': 1024 * 1024}
+        megabytes = float(match.group(1)) * factors[match.group(2).upper()]
+
+    if not megabytes > 0:
+        raise ValueError(f"Memory amount must be positive: '{value}'.")
+    return math.ceil(megabytes)
+
+def format_memory(megabytes, scheduler_type):
+    """
+    Format a memory amount in MB for the memory directive of a scheduler.
+
+    Args:
+        megabytes (int): Memory amount in MB.
+        scheduler_type (str): Type of scheduler (PBS or SLURM).
+
+    Returns:
+        str: The memory amount with the unit suffix expected by the scheduler.
+    """
+    return f"{megabytes}mb" if scheduler_type == 'PBS' else f"{megabytes}M"
+
+def memory_per_task_from_history(file_path, headroom=1.1):
+    """
+    Estimate the memory required per MPI task from the peak usage of previous runs.
+
+    The history file holds one peak memory value per line, in any format accepted by
+    parse_memory (e.g., the MaxRSS column of 'sacct --noheader -o MaxRSS'). Blank lines
+    and lines that are not memory amounts, such as headers, are ignored.
+
+    Args:
+        file_path (str): Path to the memory history file.
+        headroom (float, optional): Factor applied to the largest recorded peak. Defaults to 1.1.
+
+    Returns:
+        int: Memory per task in MB, or None if the file has no usable values.
+    """
+    peaks = []
+    with open(file_path, 'r') as history_file:
+        for line in history_file:
+            try:
+                peak = parse_memory(line.strip()) if line.strip() else None
+            except ValueError:
+                peak = None
+            if peak:
+                peaks.append(peak)
+
+    if not peaks:
+        return None
+    return math.ceil(max(peaks) * headroom)
+
+def resolve_memory_per_task(args, extra_info):
+    """
+    Resolve the memory required per MPI task.
+
+    Args:
+        args (argparse.Namespace): Command-line arguments.
+        extra_info (dict): The 'scheduler > extraInfo' configuration.
+
+    Returns:
+        int: Memory per task in MB from --memory-per-task, the 'memory_per_task' entry or the
+        'memory_history' file, in this order, or None if none of them is given.
+    """
+    memory_per_task = parse_memory(getattr(args, 'memory_per_task', None) or extra_info.get('memory_per_task'))
+    if memory_per_task is None and extra_info.get('memory_history'):
+        memory_per_task = memory_per_task_from_history(extra_info['memory_history'])
+    return memory_per_task
+
+def runtime_from_history(file_path):
+    """
+    Estimate the runtime of a job from the runtimes of previous runs.
+
+    The history file holds one runtime per line, in any format accepted by walltime_to_seconds
+    (e.g., the Elapsed column of 'sacct --noheader -X -o Elapsed'). Blank lines and lines that
+    are not runtimes, such as headers, are ignored.
+
+    Args:
+        file_path (str): Path to the runtime history file.
+
+    Returns:
+        int: Median of the recorded runtimes in seconds, or None if the file has no usable values.
+    """
+    runtimes = []
+    with open(file_path, 'r') as history_file:
+        for line in history_file:
+            try:
+                runtimes.append(walltime_to_seconds(line.strip()))
+            except ValueError:
+                continue
+
+    if not runtimes:
+        return None
+    runtimes.sort()
+    return runtimes[len(runtimes) // 2]
+
+@profiled('read_yaml_config')
 def read_yaml_config(file_path):
     """
     Read and parse a YAML configuration file.
@@ -162,6 +329,50 @@ def is_key_not_present(dictionary, key):
     """
     return key not in dictionary
 
+def executable_name(command):
+    """
+    Get the name of the executable of a command.
+
+    Args:
+        command (str): Command line, e.g. 'bin/gsi.exe -cycle {cycle:%Y%m%d%H}'.
+
+    Returns:
+        str: Base name of the first word of the command (e.g., 'gsi.exe'), or None if the command is empty.
+    """
+    words = str(command or '').split()
+    return os.path.basename(words[0]) if words else None
+
+def fill_date_mask(text, date):
+    """
+    Replace the date placeholders of a string with a date.
+
+    Parameters:
+    - text (str): String with strftime placeholders, such as 'gsiStdout_%Y%m%d%H.log'. '%%' stands for a literal '%'.
+    - date (datetime): Date used to fill the placeholders.
+
+    Returns:
+    - str: The string with the placeholders replaced. Values other than strings are returned unchanged.
+    """
+    if not isinstance(text, str):
+        return text
+    return re.sub(r'%%|%[YyjJmMdDhHISs]+', lambda match: '%' if match.group(0) == '%%' else date.strftime(match.group(0)), text)
+
+def fill_cycle_token(text, date):
+    """
+    Replace the cycle tokens of a string with a date.
+
+    Parameters:
+    - text (str): String with '{cycle:FORMAT}' tokens, where FORMAT is a strftime format, such as
+      'gsi.exe -cycle {cycle:%Y%m%d%H}'. Other '%' patterns, such as the SLURM '%j', are kept.
+    - date (datetime): Date used to fill the tokens.
+
+    Returns:
+    - str: The string with the tokens replaced. Values other than strings are returned unchanged.
+    """
+    if not isinstance(text, str):
+        return text
+    return re.sub(r'\{cycle:([^}]*)\}', lambda match: date.strftime(match.group(1)), text)
+
 def create_ulimit_command(data):
     """
     Create ulimit commands based on keys and values from a YAML file.
@@ -195,6 +406,343 @@ def create_ulimit_command(data):
 
     return ulimit_commands
 
+def create_checkpoint_commands(scheduler_type, script_name, checkpoint_command, max_resubmissions, lead, walltime=None):
+    """
+    Create the shell commands that checkpoint the application and resubmit the job.
+
+    Parameters:
+    - scheduler_type (str): Type of scheduler (PBS or SLURM).
+    - script_name (str): Path of the submission script, absolute or relative to the submission directory.
+    - checkpoint_command (str): Command that makes the application write its checkpoint.
+    - max_resubmissions (int): Maximum length of the resubmission chain.
+    - lead (int): Seconds before the wall clock limit at which the checkpoint is triggered.
+    - walltime (int, optional): Wall clock limit in seconds. Required for PBS, which has no
+      scheduler-side warning signal, so a background timer sends it instead.
+
+    Returns:
+    - str: Shell commands installing a USR1 trap. When the signal arrives, the trap runs the
+      checkpoint command, waits for the application ($APP_PID) to exit and, unless the chain
+      reached max_resubmissions, resubmits the script with GENSCHEDULER_RESTART=1 and a
+      dependency on the current job. The job exits with 0 once its continuation is submitted,
+      and with 1 when the resubmission fails or the chain limit is reached, since the run
+      did not finish.
+    """
+    if not os.path.isabs(script_name):
+        script_name = f"${'PBS_O_WORKDIR' if scheduler_type == 'PBS' else 'SLURM_SUBMIT_DIR'}/{script_name}"
+
+    if scheduler_type == 'PBS':
+        resubmit = ('qsub -W depend=afterany:$PBS_JOBID '
+                    '-v GENSCHEDULER_CHAIN=$((GENSCHEDULER_CHAIN + 1)),GENSCHEDULER_RESTART=1 '
+                    f'{script_name}')
+    else:
+        resubmit = ('sbatch --dependency=afterany:$SLURM_JOB_ID '
+                    '--export=ALL,GENSCHEDULER_CHAIN=$((GENSCHEDULER_CHAIN + 1)),GENSCHEDULER_RESTART=1 '
+                    f'{script_name}')
+
+    commands = "\n# Checkpoint and resubmit before the wall clock limit is reached\n"
+    commands += "GENSCHEDULER_CHAIN=${GENSCHEDULER_CHAIN:-0}\n"
+    commands += "checkpoint_and_resubmit() {\n"
+    commands += f"    {checkpoint_command}\n"
+    commands += "    wait $APP_PID\n"
+    commands += f"    if [ $GENSCHEDULER_CHAIN -lt {max_resubmissions} ]; then\n"
+    commands += f"        {resubmit} || exit 1\n"
+    commands += "        exit 0\n"
+    commands += "    fi\n"
+    commands += f"    echo \"Resubmission chain limit ({max_resubmissions}) reached before the run finished.\" >&2\n"
+    commands += "    exit 1\n"
+    commands += "}\n"
+    commands += "trap checkpoint_and_resubmit USR1\n"
+
+    if scheduler_type == 'PBS':
+        commands += f"( sleep {max(walltime - lead, 0)}; kill -USR1 $$ ) &\n"
+        commands += "WATCHDOG_PID=$!\n"
+
+    return commands
+
+def create_cycle_submission_commands(scheduler_type):
+    """
+    Create the header of a shell script that submits a chain of cycles.
+
+    Parameters:
+    - scheduler_type (str): Type of scheduler (PBS or SLURM).
+
+    Returns:
+    - str: Shell commands defining a 'submit' function. Each call submits one script with an
+      'afterok' dependency on the job submitted by the previous call, and prints the script
+      name and its job ID. The first argument of the shell script, if given, is the ID of a
+      job the first cycle depends on. Submission stops at the first error.
+    """
+    if scheduler_type == 'PBS':
+        submit = 'qsub ${PREVIOUS_JOB_ID:+-W depend=afterok:$PREVIOUS_JOB_ID} "$1"'
+    else:
+        submit = 'sbatch --parsable ${PREVIOUS_JOB_ID:+--dependency=afterok:$PREVIOUS_JOB_ID} "$1" | cut -d\';\' -f1'
+
+    commands = "#!/bin/bash\n"
+    commands += "# Submit the cycles in order, each one starting only after the previous one succeeded\n"
+    commands += "set -e -o pipefail\n"
+    commands += "PREVIOUS_JOB_ID=${1:-}\n"
+    commands += "submit() {\n"
+    commands += f"    PREVIOUS_JOB_ID=$({submit})\n"
+    commands += "    echo \"$1 $PREVIOUS_JOB_ID\"\n"
+    commands += "}\n"
+
+    return commands
+
+def candidate_layouts(max_cores_per_node, mpi_tasks, threads_per_mpi_task, walltime, scales,
+                      memory_per_node=None, memory_per_task=None, scaling_exponent=None, max_walltime=None):
+    """
+    Create candidate layouts by scaling the number of MPI tasks of a job.
+
+    Parameters:
+    - max_cores_per_node (int): Maximum number of cores per node.
+    - mpi_tasks (int): Number of MPI tasks of the reference layout.
+    - threads_per_mpi_task (int): Number of threads per MPI task.
+    - walltime (int): Wall clock limit of the reference layout, in seconds.
+    - scales (list): Scale factors applied to the number of MPI tasks.
+    - memory_per_node (int, optional): Usable memory per node, in MB.
+    - memory_per_task (int, optional): Memory required by each MPI task, in MB.
+    - scaling_exponent (float, optional): Exponent of the runtime model. The wall clock limit of
+      each candidate is walltime / scale ** scaling_exponent, rounded up to whole minutes; 1.0
+      assumes perfect strong scaling. Without a model (None), larger candidates keep the
+      requested time and smaller ones get walltime / scale, the most a job can slow down
+      when it loses tasks, so no candidate gets less time than it may need.
+    - max_walltime (int, optional): Longest wall clock limit accepted by the queue, in seconds.
+      Candidates needing more are left out.
+
+    Returns:
+    - list: Pairs of (ParallelProcessingInfo, wall clock limit in seconds). The reference layout
+      comes first, followed by the others from the closest to the farthest scale, so that the
+      reference layout is kept unless another one is predicted to finish strictly earlier.
+    """
+    candidates = []
+    for scale in sorted({scale for scale in scales if scale > 0} | {1.0}, key=lambda scale: abs(math.log(scale))):
+        tasks = max(threads_per_mpi_task, int(round(mpi_tasks * scale)))
+        layout = ParallelProcessingInfo(max_cores_per_node, tasks, threads_per_mpi_task, memory_per_node, memory_per_task)
+        exponent = scaling_exponent if scaling_exponent is not None else (1.0 if tasks < mpi_tasks else 0.0)
+        seconds = math.ceil(walltime / (tasks / mpi_tasks) ** exponent / 60) * 60
+        if max_walltime is not None and seconds > max_walltime:
+            continue
+        candidates.append((layout, seconds))
+    return candidates
+
+def load_queue_simulator(machine, scheduler_type, queue_snapshot, nodes_snapshot=None):
+    """
+    Load the queue snapshot of a machine.
+
+    Args:
+        machine (dict): Machine configuration, providing 'total_nodes' when no nodes snapshot is given.
+        scheduler_type (str): Type of scheduler (PBS or SLURM).
+        queue_snapshot (str): Saved squeue (SLURM) or 'qstat -a' (PBS) output.
+        nodes_snapshot (str, optional): Saved sinfo output (SLURM).
+
+    Returns:
+        QueueSimulator: A simulator loaded with the snapshot.
+
+    Raises:
+        ValueError: If the number of nodes of the machine is unknown.
+    """
+    total_nodes = machine.get('total_nodes')
+    if scheduler_type == 'SLURM' and (nodes_snapshot or total_nodes):
+        return QueueSimulator.from_slurm(queue_snapshot, nodes_snapshot, total_nodes)
+    if scheduler_type == 'PBS' and total_nodes:
+        return QueueSimulator.from_pbs(queue_snapshot, total_nodes)
+    raise ValueError("The number of nodes is unknown: provide a nodes snapshot (SLURM) or 'total_nodes' for the machine.")
+
+def select_machine(config, args):
+    """
+    Select the machine with the best predicted turnaround for a job.
+
+    A machine is eligible when its scheduler and maximum cores per node are known, it loads
+    every module listed in 'required_modules' (scheduler > extraInfo), it provides the
+    executable if it lists its 'executables', defines the requested tuning profile, a task fits
+    in the memory of its nodes (see resolve_memory_per_task), and its queue wait can be predicted. Each eligible machine is scored by its predicted queue wait
+    plus its predicted runtime:
+
+    - The runtime is the median of its 'runtime_history' file, or the wall clock limit divided
+      by its 'speed_factor' (default: 1.0). The wall clock limit is raised, if needed, to cover
+      the runtime, and must not exceed the machine 'max_wall_clock_limit'.
+    - The queue wait is predicted from its 'queue_snapshot' (and 'nodes_snapshot' or
+      'total_nodes'), or else taken from its 'assumed_wait'.
+
+    The reason each machine is left out, and the score of each eligible one, are reported on
+    standard error.
+
+    Args:
+        config (dict): Configuration data obtained from a YAML file.
+        args (argparse.Namespace): Command-line arguments.
+
+    Returns:
+        tuple: (machine name, scheduler type, wall clock limit in seconds) of the selected machine.
+
+    Raises:
+        ValueError: If no machine is eligible.
+    """
+    directives = config['scheduler'].get('directives', {})
+    extra_info = config['scheduler'].get('extraInfo', {})
+    required_modules = extra_info.get('required_modules', [])
+    executable = executable_name(extra_info.get('exec'))
+    memory_per_task = resolve_memory_per_task(args, extra_info)
+
+    best, best_turnaround = None, None
+    for machine_name, machine in config['machine'].items():
+        try:
+            scheduler_type = machine.get('scheduler', args.scheduler)
+            max_cores_per_node = args.max_cores_per_node if args.max_cores_per_node is not None else machine.get('max_cores_per_node')
+            if scheduler_type is None or max_cores_per_node is None:
+                raise ValueError("scheduler or maximum cores per node not defined.")
+
+            modules = machine.get('modules', [])
+            missing = [required for required in required_modules
+                       if not any(module == required or module.startswith(f"{required}/") for module in modules)]
+            if missing:
+                raise ValueError(f"missing modules {', '.join(missing)}.")
+            if executable and 'executables' in machine and executable not in machine['executables']:
+                raise ValueError(f"executable {executable} not available.")
+            tuning_profile_name = getattr(args, 'tuning_profile', None) or machine.get('tuning_profile')
+            if tuning_profile_name:
+                resolve_tuning_profile(config, machine_name, executable, tuning_profile_name)
+
+            walltime = getattr(args, 'wall_clock_limit', None) or machine.get('wall_clock_limit') or directives.get('wall_clock_limit')
+            if walltime is None:
+                raise ValueError("wall clock limit not defined.")
+            walltime = math.ceil(walltime_to_seconds(walltime, scheduler_type) / float(machine.get('speed_factor', 1.0)) / 60) * 60
+
+            layout = ParallelProcessingInfo(max_cores_per_node, args.mpi_tasks, args.threads_per_mpi_task,
+                                            parse_memory(getattr(args, 'memory_per_node', None) or machine.get('memory_per_node')),
+                                            memory_per_task)
+
+            runtime = runtime_from_history(machine['runtime_history']) if machine.get('runtime_history') else None
+            if runtime is None:
+                runtime = walltime
+            walltime = max(walltime, math.ceil(runtime / 60) * 60)
+            if machine.get('max_wall_clock_limit') and walltime > walltime_to_seconds(machine['max_wall_clock_limit'], scheduler_type):
+                raise ValueError(f"wall clock limit {seconds_to_walltime(walltime)} exceeds the queue maximum.")
+
+            if machine.get('queue_snapshot'):
+                simulator = load_queue_simulator(machine, scheduler_type, machine['queue_snapshot'], machine.get('nodes_snapshot'))
+                wait = simulator.predict_start(layout.nodes, walltime)
+                if wait is None:
+                    raise ValueError(f"{layout.nodes} nodes exceed the nodes of the queue.")
+            elif machine.get('assumed_wait') is not None:
+                wait = walltime_to_seconds(machine['assumed_wait'], scheduler_type)
+            else:
+                raise ValueError("no 'queue_snapshot' or 'assumed_wait' to predict the queue wait.")
+        except ValueError as ve:
+            print(f"Machine {machine_name} not eligible: {str(ve)}", file=sys.stderr)
+            continue
+
+        print(f"Machine {machine_name}: predicted wait {wait // 60} minutes, runtime {runtime // 60} minutes.", file=sys.stderr)
+        if best_turnaround is None or wait + runtime < best_turnaround:
+            best, best_turnaround = (machine_name, scheduler_type, walltime), wait + runtime
+
+    if best is None:
+        raise ValueError("No eligible machine found in the configuration.")
+    return best
+
+def resolve_tuning_profile(config, machine_name, application, profile_name):
+    """
+    Resolve a runtime tuning profile for a machine and application.
+
+    A profile may be defined at three levels, merged in this order, later levels taking precedence:
+
+    1. 'tuning_profiles > <profile name>': shared by every machine.
+    2. 'machine > <machine name> > tuning_profiles > <profile name>': specific to the machine.
+    3. '... > <profile name> > applications > <executable>': specific to the machine and application.
+
+    Each level may define 'version', 'export' (same format as the machine 'export'), 'modules'
+    and 'launcher_options' (options added to the srun/aprun command, e.g. '--cpu-freq=High').
+
+    Args:
+        config (dict): Configuration data obtained from a YAML file.
+        machine_name (str): Name of the target machine.
+        application (str): Name of the executable, or None.
+        profile_name (str): Name of the tuning profile.
+
+    Returns:
+        dict: The merged profile, with the keys version, export, modules and launcher_options.
+
+    Raises:
+        ValueError: If the profile is not defined for the machine.
+    """
+    machine_profile = config['machine'].get(machine_name, {}).get('tuning_profiles', {}).get(profile_name)
+    levels = [config.get('tuning_profiles', {}).get(profile_name), machine_profile,
+              (machine_profile or {}).get('applications', {}).get(application)]
+    if not any(levels):
+        raise ValueError(f"Tuning profile '{profile_name}' is not defined for machine '{machine_name}'.")
+
+    profile = {'version': None, 'export': [], 'modules': [], 'launcher_options': []}
+    for level in filter(None, levels):
+        profile['version'] = level.get('version', profile['version'])
+        profile['export'] = merge_exports(profile['export'], level.get('export', []))
+        profile['modules'] = merge_modules(profile['modules'], level.get('modules', []))
+        profile['launcher_options'] = merge_launcher_options(profile['launcher_options'], level.get('launcher_options', []))
+    return profile
+
+def merge_exports(base, overrides):
+    """
+    Merge two lists of environment variables, the overrides taking precedence.
+
+    Parameters:
+    - base (list): Environment variables as a list of {name: value} dictionaries.
+    - overrides (list): Environment variables in the same format.
+
+    Returns:
+    - list: The merged environment variables. Overridden variables keep their position in base.
+    """
+    merged = {}
+    for item in list(base) + list(overrides):
+        merged.update(item)
+    return [{key: value} for key, value in merged.items()]
+
+def merge_modules(base, overrides):
+    """
+    Merge two lists of modules, the overrides taking precedence.
+
+    A module in overrides replaces, in place, a module of base with the same name and another
+    version, e.g. 'openmpi4/4.1.4' replaces 'openmpi4/4.1.1'; the other modules are added at the
+    end. Keeping the position of replaced modules preserves the load order required by
+    hierarchical module systems such as Lmod, where libraries depend on the compiler and MPI.
+
+    Parameters:
+    - base (list): Module names.
+    - overrides (list): Module names.
+
+    Returns:
+    - list: The merged module names.
+    """
+    merged = list(base)
+    for module in overrides:
+        name = module.split('/')[0]
+        positions = [index for index, existing in enumerate(merged) if existing.split('/')[0] == name]
+        if positions:
+            merged[positions[0]] = module
+            merged = [existing for index, existing in enumerate(merged) if index not in positions[1:]]
+        else:
+            merged.append(module)
+    return merged
+
+def merge_launcher_options(base, overrides):
+    """
+    Merge two lists of launcher options, the overrides taking precedence.
+
+    An option in overrides replaces an option of base with the same name, e.g.
+    '--cpu-freq=Medium' replaces '--cpu-freq=High'.
+
+    Parameters:
+    - base (list): Launcher options.
+    - overrides (list): Launcher options.
+
+    Returns:
+    - list: The merged launcher options.
+    """
+    merged = list(base)
+    for option in overrides:
+        name = option.split('=')[0].split()[0]
+        merged = [existing for existing in merged if existing.split('=')[0].split()[0] != name]
+        merged.append(option)
+    return merged
+
+@profiled('merge_keys')
 def merge_keys(standard_keys, *dictionaries):
     """
     Merges keys from multiple dictionaries while filtering them against a list of standard keys.
@@ -228,7 +776,87 @@ def merge_keys(standard_keys, *dictionaries):
 
 
 
-def generate_submission_script(config, args):
+@profiled('resolve_placement')
+def resolve_placement(config, args):
+    """
+    Resolve the machine and the job layout chosen from queue predictions.
+
+    With args.machine set to 'auto', the machine with the best predicted turnaround is
+    selected; with args.queue_snapshot, the candidate layout with the earliest predicted
+    completion replaces the requested one. The choices are reported on stderr.
+
+    Args:
+        config (dict): Configuration data obtained from a YAML file.
+        args (argparse.Namespace): Command-line arguments.
+
+    Returns:
+        argparse.Namespace: A copy of args with the machine, scheduler, mpi_tasks and
+        wall_clock_limit resolved, and queue_snapshot cleared, or args itself when there
+        is nothing to resolve. Resolving the returned arguments again changes nothing.
+    """
+    try:
+        if args.machine != 'auto' and not getattr(args, 'queue_snapshot', None):
+            return args
+        args = argparse.Namespace(**vars(args))
+
+        # Select the Machine with the Best Predicted Turnaround (Optional)
+        if args.machine == 'auto':
+            machine_name, scheduler_type, walltime = select_machine(config, args)
+            args.machine = machine_name
+            args.scheduler = scheduler_type
+            args.wall_clock_limit = seconds_to_walltime(walltime)
+            print(f"Selected machine: {machine_name}", file=sys.stderr)
+
+        # Choose the Layout from a Queue Snapshot (Optional)
+        # - Candidate layouts scale the number of MPI tasks and, with 'scaling_exponent', the wall clock limit.
+        # - The candidate with the earliest predicted completion replaces the requested layout.
+        if getattr(args, 'queue_snapshot', None):
+            directives = config['scheduler'].get('directives', {})
+            extra_info = config['scheduler'].get('extraInfo', {})
+            machine = config['machine'].get(args.machine, {})
+            scheduler_type = args.scheduler or machine.get('scheduler')
+            if scheduler_type is None:
+                raise ValueError("Scheduler type must be defined.")
+
+            max_cores_per_node = args.max_cores_per_node if args.max_cores_per_node is not None else machine.get('max_cores_per_node')
+            if max_cores_per_node is None:
+                raise ValueError('Maximum cores per node must be defined.')
+
+            memory_per_node = parse_memory(getattr(args, 'memory_per_node', None) or machine.get('memory_per_node'))
+            memory_per_task = resolve_memory_per_task(args, extra_info)
+
+            walltime = getattr(args, 'wall_clock_limit', None) or machine.get('wall_clock_limit') or directives.get('wall_clock_limit')
+            if walltime is None:
+                raise ValueError("Choosing a layout from a queue snapshot requires a wall clock limit.")
+
+            simulator = load_queue_simulator(machine, scheduler_type, args.queue_snapshot, getattr(args, 'nodes_snapshot', None))
+
+            scaling_exponent = extra_info.get('scaling_exponent')
+            candidates = candidate_layouts(max_cores_per_node, args.mpi_tasks, args.threads_per_mpi_task,
+                                           walltime_to_seconds(walltime, scheduler_type), args.layout_scales,
+                                           memory_per_node, memory_per_task,
+                                           float(scaling_exponent) if scaling_exponent is not None else None,
+                                           walltime_to_seconds(machine['max_wall_clock_limit'], scheduler_type)
+                                           if machine.get('max_wall_clock_limit') else None)
+            best = simulator.choose_layout(candidates)
+            if best is None:
+                raise ValueError("No candidate layout fits in the nodes and wall clock limit of the queue.")
+
+            processing_info, walltime, start = best
+            args.mpi_tasks = processing_info.mpi_tasks
+            args.wall_clock_limit = seconds_to_walltime(walltime)
+            args.queue_snapshot = None
+            print(f"Selected layout: {processing_info.mpi_tasks} MPI tasks on {processing_info.nodes} nodes, "
+                  f"wall clock limit {args.wall_clock_limit}, predicted start in {start // 60} minutes.", file=sys.stderr)
+
+        return args
+
+    except ValueError as ve:
+        print(f"Error: {str(ve)}", file=sys.stderr)
+        exit(1)
+
+@profiled('generate_submission_script')
+def generate_submission_script(config, args, cycle_date=None, previous_cycle_date=None):
     """
     Generate a submission script for job scheduling systems (PBS/SLURM) based on the provided configuration and inputs.
 
@@ -239,6 +867,10 @@ def generate_submission_script(config, args):
         mpi_tasks (int): Total number of MPI tasks.
         threads_per_mpi_task (int): Number of threads per MPI task.
         max_cores_per_node (int, optional): Maximum number of cores per node. If not provided, it will be retrieved from the configuration.
+        cycle_date (datetime, optional): Date of the cycle. When given, the '{cycle:FORMAT}' tokens of the directives,
+            executable, redirections, environment variables and commands, and the plain date placeholders of the
+            redirection and output filename, are filled with it, and CYCLE_DATE is exported.
+        previous_cycle_date (datetime, optional): Date of the previous cycle, exported as PREVIOUS_CYCLE_DATE.
 
     Returns:
         str: The generated submission script as a string.
@@ -248,9 +880,15 @@ def generate_submission_script(config, args):
         # - It includes configuration directives, machine-specific settings, shell information, and handling of core allocation.
         # - The script ensures that required values are defined and sets up parallel processing information.
 
+        # Select the Machine and the Layout (Optional)
+        args = resolve_placement(config, args)
+
         # Initialize Scheduler and Gather Relevant Information
         scheduler = initialize_directives()
-        scheduler_type = args.scheduler
+        machine_name = getattr(args, 'machine')
+        scheduler_type = args.scheduler or config['machine'].get(machine_name, {}).get('scheduler')
+        if scheduler_type is None:
+            raise ValueError("Scheduler type must be defined.")
         
         # Extract and Organize Information from Configuration
         # - Directives are configuration options for the scheduler.
@@ -261,7 +899,6 @@ def generate_submission_script(config, args):
         # - Shell name is determined from the shebang.
         directives   = config['scheduler'].get('directives', [])
         extra_info   = config['scheduler'].get('extraInfo', [])
-        machine_name = getattr(args, 'machine')
         machine      = config['machine'].get(machine_name, {})
         export       = machine.get('export', [])
         modules      = machine.get('modules', [])
@@ -269,21 +906,53 @@ def generate_submission_script(config, args):
         shebang      = directives.get('shell', '/bin/bash')
         shell_name   = os.path.basename(shebang)
 
+        # Fill the Cycle Date (Optional)
+        # - In cycle mode the '{cycle:FORMAT}' tokens are filled with the cycle date, and the
+        #   cycle dates are exported for the commands of the script. Scheduler patterns such
+        #   as '%j' in the directives are left untouched.
+        if cycle_date is not None:
+            directives = {key: fill_cycle_token(value, cycle_date) for key, value in directives.items()}
+            machine = {key: fill_cycle_token(value, cycle_date) for key, value in machine.items()}
+            commands = [fill_cycle_token(command, cycle_date) for command in commands]
+            export = [{key: fill_cycle_token(value, cycle_date) for key, value in item.items()} for item in export]
+            cycle_export = [{'CYCLE_DATE': cycle_date.strftime('%Y%m%d%H')}]
+            if previous_cycle_date is not None:
+                cycle_export.append({'PREVIOUS_CYCLE_DATE': previous_cycle_date.strftime('%Y%m%d%H')})
+            export = cycle_export + export
+
+        # Apply the Runtime Tuning Profile (Optional)
+        # - The profile is chosen on the command line or by the machine 'tuning_profile' default.
+        # - Its environment variables and modules take precedence over those of the machine.
+        tuning_profile_name = getattr(args, 'tuning_profile', None) or machine.get('tuning_profile')
+        tuning_profile = None
+        if tuning_profile_name:
+            tuning_profile = resolve_tuning_profile(config, machine_name, executable_name(extra_info.get('exec')), tuning_profile_name)
+            export = merge_exports(export, tuning_profile['export'])
+            modules = merge_modules(modules, tuning_profile['modules'])
+
         # Check if the 'machine' configuration is empty.
         if not machine:
             # Generate a warning message to inform the user about the empty configuration.
-            print("Machine configuration is empty. Please check your configuration.")
-            print(f'Machine name: {machine_name}')
+            print("Machine configuration is empty. Please check your configuration.", file=sys.stderr)
+            print(f'Machine name: {machine_name}', file=sys.stderr)
             
         # Handle Maximum Cores per Node Configuration
         max_cores_per_node = args.max_cores_per_node if args.max_cores_per_node is not None else machine.get('max_cores_per_node')
         if max_cores_per_node is None:
             raise ValueError('Maximum cores per node must be defined.')
-        
+
+        # Handle Memory Configuration
+        # - Usable memory per node comes from the command line or the machine configuration.
+        # - Memory per task comes from the command line, the 'memory_per_task' entry, or the
+        #   peak usage recorded in the 'memory_history' file of previous runs.
+        memory_per_node = parse_memory(getattr(args, 'memory_per_node', None) or machine.get('memory_per_node'))
+        memory_per_task = resolve_memory_per_task(args, extra_info)
+
         # Initialize Parallel Processing Information
         # - This section sets up information related to parallel processing, including
-        #   maximum cores per node, MPI tasks, and threads per MPI task.
-        processing_info = ParallelProcessingInfo(max_cores_per_node, args.mpi_tasks, args.threads_per_mpi_task)
+        #   maximum cores per node, MPI tasks, threads per MPI task and memory limits.
+        processing_info = ParallelProcessingInfo(max_cores_per_node, args.mpi_tasks, args.threads_per_mpi_task,
+                                                 memory_per_node, memory_per_task)
 
         # Retrieve all available scheduling directives from the configuration file (directives.yaml).
         standard_directives = scheduler.get_directive_names()
@@ -295,10 +964,15 @@ def generate_submission_script(config, args):
         # and machine-specific directives for optimal scheduling decisions.
         all_directives = merge_keys(standard_directives, directives_args, directives, machine)
 
+        # Request the memory implied by the memory model, unless given on the command line.
+        if processing_info.memory_request is not None and 'memory_size' not in all_directives:
+            all_directives.append('memory_size')
+
         # Start building the submission script.
         script = f"#!{shebang}\n"
 
         job_name = scheduler_type
+        wall_clock_limit = None
         # Process the list of directives from the file
         for directive in all_directives:
             value = None
@@ -310,15 +984,25 @@ def generate_submission_script(config, args):
             # Handle machine-specific values
             if directive in machine:
                 value = machine[directive]
+
+            # Handle the memory computed from the memory model
+            # - SLURM '--mem' is per node, PBS '-l mem' is for the whole job.
+            if directive == 'memory_size' and processing_info.memory_request is not None:
+                memory = processing_info.memory_request * (processing_info.nodes if scheduler_type == 'PBS' else 1)
+                value = format_memory(memory, scheduler_type)
         
             # Handle command line values
             if getattr(args, directive, None) is not None:
-                value = getattr(args, directive)
+                value = getattr(args, directive) if cycle_date is None else fill_cycle_token(getattr(args, directive), cycle_date)
 
             # Check if the directive is 'job_name' and assign its value to 'job_name'
             if directive == 'job_name':
                 job_name = value
 
+            # Keep the wall clock limit for the checkpoint timer
+            if directive == 'wall_clock_limit':
+                wall_clock_limit = value
+
             # Insert directives.
             if scheduler.get_directive(directive, scheduler_type):
                 script += f"{scheduler.get_directive('hash', scheduler_type)} {scheduler.get_directive(directive, scheduler_type)} {value}\n"
@@ -331,8 +1015,25 @@ def generate_submission_script(config, args):
         
         if is_key_not_present(directives, 'node_count'):
             script += f"{scheduler.get_directive('hash', scheduler_type)} {scheduler.get_directive('node_count', scheduler_type)} {processing_info.nodes}\n"
+
+        # Checkpoint Mode
+        # - SLURM sends USR1 to the batch shell 'checkpoint_lead' seconds before the wall clock limit.
+        # - PBS has no equivalent directive; a timer started by the script sends the signal instead.
+        checkpoint_lead = int(extra_info.get('checkpoint_lead', 300))
+        if getattr(args, 'checkpoint', False):
+            if shell_name in ("tsh", "csh", "tcsh"):
+                raise ValueError("Checkpoint mode requires a Bourne-compatible shell.")
+            if scheduler_type == 'SLURM':
+                script += f"{scheduler.get_directive('hash', scheduler_type)} --signal=B:USR1@{checkpoint_lead}\n"
+            elif wall_clock_limit is None:
+                raise ValueError("Checkpoint mode requires a wall clock limit.")
         
         script += "\n# Additional HPC Configuration\n"
+
+        # Record the tuning profile in the script, so runs can be traced back to their settings.
+        if tuning_profile is not None:
+            version = f" (version {tuning_profile['version']})" if tuning_profile['version'] is not None else ""
+            script += f"# Tuning profile: {tuning_profile_name}{version}\n"
         
         # Include additional HPC-specific options here
         # Example:
@@ -370,40 +1071,63 @@ def generate_submission_script(config, args):
         exec = extra_info.get('exec')
         if not exec:
             raise ValueError("Executable not configured.")
+        if cycle_date is not None:
+            exec = fill_cycle_token(exec, cycle_date)
+
+        # Generate a filename based on job name, timestamp, or other conventions
+        # - In cycle mode, the output filename accepts cycle tokens and plain strftime placeholders.
+        if args.output:
+            filename = args.output if cycle_date is None else fill_date_mask(fill_cycle_token(args.output, cycle_date), cycle_date)
+        elif cycle_date is not None:
+            filename = f"{job_name}_{cycle_date.strftime('%Y%m%d%H')}_submission_script.sh"
+        else:
+            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            filename = f"{job_name}_{timestamp}_submission_script.sh"
+
+        # Pass the restart flag to the executable when the job was resubmitted from a checkpoint
+        if getattr(args, 'checkpoint', False) and extra_info.get('restart_flag'):
+            exec += f" ${{GENSCHEDULER_RESTART:+{extra_info['restart_flag']}}}"
         
         # Redirect Standard Output (Optional)
         redirect = extra_info.get('redirect_stdout')
         if redirect:
-            # Identify placeholders in the redirect string using regular expressions
-            match = re.findall(r'%[YyjJmMdDhHISs]+', redirect)
-            if match:
-                mask = ''.join(match)
-                # Get the current date and time
-                current_datetime = datetime.now()
-                # Format the date according to the specified mask
-                formatted_date = current_datetime.strftime(mask)
-                # Replace the mask with the formatted date
-                redirect = redirect.replace(mask, formatted_date)
+            # Fill the placeholders with the cycle date, or with the current date and time
+            if cycle_date is not None:
+                redirect = fill_cycle_token(redirect, cycle_date)
+            redirect = fill_date_mask(redirect, cycle_date or datetime.now())
         
             # Append the redirection of standard output to the executable command
             exec += ' > ' + redirect
         
+        # Add the launcher options of the tuning profile
+        launcher_options = ''.join(f"{option} " for option in tuning_profile['launcher_options']) if tuning_profile else ''
+
         # Configure Working Directory and Execute the Process
         script += "\n# Change to the working directory and execute the process.\n"
         if scheduler_type == 'PBS':
             script += "cd $PBS_O_WORKDIR\n"
-            script += f"aprun -n {processing_info.pes} -N {processing_info.tasks_per_node} -d {processing_info.threads_per_mpi_task} ./{exec}\n"
+            launch = f"aprun -n {processing_info.pes} -N {processing_info.tasks_per_node} -d {processing_info.threads_per_mpi_task} {launcher_options}./{exec}"
         elif scheduler_type == 'SLURM':
             script += "cd $SLURM_SUBMIT_DIR\n"
-            script += f"srun -n {processing_info.pes} -N {processing_info.tasks_per_node} -c {processing_info.threads_per_mpi_task} ./{exec}\n"
+            launch = f"srun -n {processing_info.pes} -N {processing_info.tasks_per_node} -c {processing_info.threads_per_mpi_task} {launcher_options}./{exec}"
 
-        # Generate a filename based on job name, timestamp, or other conventions
-        if args.output:
-            filename = args.output
+        if getattr(args, 'checkpoint', False):
+            # Run the process in the background so the trap fires while waiting for it.
+            max_resubmissions = args.max_resubmissions if args.max_resubmissions is not None else extra_info.get('max_resubmissions', 10)
+            checkpoint_command = extra_info.get('checkpoint_command', 'kill -USR1 $APP_PID')
+            walltime = walltime_to_seconds(wall_clock_limit, scheduler_type) if wall_clock_limit is not None else None
+            script += create_checkpoint_commands(scheduler_type, filename, checkpoint_command, max_resubmissions, checkpoint_lead, walltime)
+            script += "\n"
+            script += f"{launch} &\n"
+            script += "APP_PID=$!\n"
+            script += "wait $APP_PID\n"
+            script += "APP_STATUS=$?\n"
+            if scheduler_type == 'PBS':
+                script += "kill $WATCHDOG_PID 2>/dev/null\n"
+            script += "exit $APP_STATUS\n"
         else:
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            filename = f"{job_name}_{timestamp}_submission_script.sh"
-        
+            script += f"{launch}\n"
+
         # Additional Information:
         # - This section prepares and executes the specified process within the HPC environment.
         # - It includes handling the executable, potential standard output redirection, and setting the working directory.
@@ -412,9 +1136,77 @@ def generate_submission_script(config, args):
         return script, filename
 
     except ValueError as ve:
-        print(f"Error: {str(ve)}")
+        print(f"Error: {str(ve)}", file=sys.stderr)
         exit(1)
 
+def parse_cycle_date(value):
+    """
+    Parse a cycle date.
+
+    Args:
+        value (str or int): Cycle date as YYYYMMDDHH.
+
+    Returns:
+        datetime: The cycle date.
+
+    Raises:
+        ValueError: If the value is not a YYYYMMDDHH date.
+    """
+    try:
+        return datetime.strptime(str(value), '%Y%m%d%H')
+    except ValueError:
+        raise ValueError(f"Invalid cycle date: '{value}'. Expected YYYYMMDDHH.")
+
+def generate_cycle_scripts(config, args, start=None, end=None, interval=None):
+    """
+    Generate one submission script per cycle of a date range, lazily.
+
+    The scripts are produced one at a time as the generator is consumed, so ranges of any
+    length are processed in constant memory.
+
+    Args:
+        config (dict): Configuration data obtained from a YAML file.
+        args (argparse.Namespace): Command-line arguments.
+        start (datetime or str, optional): First cycle date. Defaults to args.cycle_start.
+        end (datetime or str, optional): Last cycle date, included. Defaults to args.cycle_end.
+        interval (timedelta or int, optional): Interval between cycles, in hours if an int.
+            Defaults to args.cycle_interval.
+
+    Yields:
+        tuple: (cycle date, submission script, filename) for each cycle.
+
+    The machine and the layout chosen from queue predictions (see resolve_placement) are
+    resolved once, before the first cycle, and shared by all the cycles. Chaining the cycles
+    is left to the submission: see create_cycle_submission_commands.
+    """
+    start = start if start is not None else args.cycle_start
+    end = end if end is not None else args.cycle_end
+    interval = interval if interval is not None else args.cycle_interval
+
+    try:
+        start = start if isinstance(start, datetime) else parse_cycle_date(start)
+        end = end if isinstance(end, datetime) else parse_cycle_date(end)
+        interval = interval if isinstance(interval, timedelta) else timedelta(hours=interval)
+        if interval <= timedelta(0):
+            raise ValueError("The cycle interval must be positive.")
+        if args.output and not re.search(r'%[YyjJmMdDhHISs]|\{cycle:', args.output):
+            raise ValueError("In cycle mode the output filename must contain a date mask (e.g., gsi_{cycle:%Y%m%d%H}.sh).")
+        if getattr(args, 'checkpoint', False) and getattr(args, 'cycle_dependency', None):
+            raise ValueError("Checkpoint mode cannot be combined with cycle dependencies: a checkpointed job ends "
+                             "successfully while its continuation is still queued, so the next cycle would start too early.")
+
+    except ValueError as ve:
+        print(f"Error: {str(ve)}", file=sys.stderr)
+        exit(1)
+
+    args = resolve_placement(config, args)
+
+    cycle_date = start
+    while cycle_date <= end:
+        script, filename = generate_submission_script(config, args, cycle_date, cycle_date - interval)
+        yield cycle_date, script, filename
+        cycle_date += interval
+
 #EOC
 #-----------------------------------------------------------------------------#
 
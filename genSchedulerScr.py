@@ -38,7 +38,11 @@
 #EOP
 #-----------------------------------------------------------------------------#
 #BOC
-from genScheduler.script_generator import read_yaml_config, generate_submission_script, parser
+import argparse
+from contextlib import ExitStack, nullcontext
+from genScheduler.script_generator import read_yaml_config, generate_submission_script, generate_cycle_scripts, parser
+from genScheduler.script_generator import resolve_placement, create_cycle_submission_commands
+from genScheduler.profiler import profiling, profile_stage
 
 def main():
     """
@@ -48,20 +52,57 @@ def main():
     from the "config.yml" file, generates a submission script based on the specified
     scheduler type and provided arguments, and saves the script to a file.
 
+    With --cycle-start and --cycle-end, one script is written per cycle and its filename is
+    printed, one per line, as soon as it is written, so the output can be piped to a submission loop.
+    With --cycle-dependency [FILE], a script submitting the cycles in order, each one with an
+    'afterok' dependency on the previous one, is also written (submit_cycles.sh by default).
+
+    With --profile [FILE], the time and memory of each stage, including the parsing of
+    the command line itself, are appended to a JSON Lines report (genScheduler_profile.jsonl by default).
+
     Example Usage:
     - Run this script to generate a submission script for job scheduling.
 
     Returns:
     - None
     """
-    
-    args   = parser()
-    config = read_yaml_config('config.yml')
-    script, filename = generate_submission_script(config, args)
 
-    # Save the generated submission script to the generated filename
-    with open(filename, 'w') as script_file:
-        script_file.write(script)
+    # Look for --profile before the full parser runs, so that the parser is profiled too.
+    pre_parser = argparse.ArgumentParser(add_help=False)
+    pre_parser.add_argument("--profile", type=str, nargs='?', const='genScheduler_profile.jsonl')
+    profile_file = pre_parser.parse_known_args()[0].profile
+
+    with profiling(profile_file) if profile_file else nullcontext():
+        args   = parser()
+        config = read_yaml_config('config.yml')
+
+        if args.cycle_start:
+            # Choose the machine and the layout once for all the cycles
+            args = resolve_placement(config, args)
+
+            # Generate and save one submission script per cycle, and the submission chain (Optional)
+            # - The submission script is created with the first cycle, once the arguments are validated.
+            with ExitStack() as stack:
+                submit_file = None
+                for cycle_date, script, filename in generate_cycle_scripts(config, args):
+                    with profile_stage('write_script'):
+                        with open(filename, 'w') as script_file:
+                            script_file.write(script)
+                    if args.cycle_dependency:
+                        if submit_file is None:
+                            scheduler_type = args.scheduler or config['machine'].get(args.machine, {}).get('scheduler')
+                            submit_file = stack.enter_context(open(args.cycle_dependency, 'w'))
+                            submit_file.write(create_cycle_submission_commands(scheduler_type))
+                        submit_file.write(f"submit {filename}\n")
+                    print(filename, flush=True)
+            return
+
+        script, filename = generate_submission_script(config, args)
+
+        # Save the generated submission script to the generated filename
+        with profile_stage('write_script'):
+            with open(filename, 'w') as script_file:
+                script_file.write(script)
 
 if __name__ == '__main__':
     main()
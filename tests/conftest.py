@@ -0,0 +1,17 @@
+import os
+
+import pytest
+
+from genScheduler import script_generator
+
+
+@pytest.fixture
+def config():
+    return script_generator.read_yaml_config(os.path.join(os.path.dirname(__file__), 'config.yml'))
+
+
+@pytest.fixture
+def parse_args():
+    def parse(*argv):
+        return script_generator.build_parser().parse_args(list(argv))
+    return parse
@@ -0,0 +1,37 @@
+import os
+import subprocess
+
+import pytest
+
+from genScheduler.script_generator import create_checkpoint_commands, generate_cycle_scripts
+
+
+def run_trap(tmp_path, chain):
+    # Run the trap function directly, with a fake sbatch recording its arguments.
+    sbatch = tmp_path / 'sbatch'
+    sbatch.write_text(f"#!/bin/bash\necho \"$@\" > {tmp_path / 'submitted'}\n")
+    sbatch.chmod(0o755)
+    commands = create_checkpoint_commands('SLURM', '/work/gsi.sh', 'true', 2, 300)
+    script = f"sleep 0 &\nAPP_PID=$!\n{commands}checkpoint_and_resubmit\n"
+    env = dict(os.environ, PATH=f"{tmp_path}:{os.environ['PATH']}", GENSCHEDULER_CHAIN=str(chain))
+    return subprocess.run(['bash', '-c', script], env=env, capture_output=True, text=True)
+
+
+def test_checkpoint_resubmits_and_succeeds(tmp_path):
+    result = run_trap(tmp_path, chain=1)
+    assert result.returncode == 0
+    assert 'GENSCHEDULER_CHAIN=2' in (tmp_path / 'submitted').read_text()
+
+
+def test_checkpoint_fails_at_chain_limit(tmp_path):
+    result = run_trap(tmp_path, chain=2)
+    assert result.returncode == 1
+    assert 'chain limit (2) reached' in result.stderr
+    assert not (tmp_path / 'submitted').exists()
+
+
+def test_checkpoint_rejects_cycle_dependency(config, parse_args):
+    args = parse_args('--machine', 'EGEON', '--mpi-tasks', '128', '--threads-per-mpi-task', '1', '--checkpoint',
+                      '--cycle-start', '2020010100', '--cycle-end', '2020010106', '--cycle-dependency')
+    with pytest.raises(SystemExit):
+        next(generate_cycle_scripts(config, args))
@@ -0,0 +1,94 @@
+import subprocess
+
+import pytest
+
+from genScheduler import script_generator
+from genScheduler.script_generator import create_cycle_submission_commands, generate_cycle_scripts
+
+
+@pytest.fixture
+def cycle_config(config):
+    config['scheduler']['extraInfo'].update(exec='gsi.exe -cycle {cycle:%Y%m%d%H}', redirect_stdout='gsiStdout_%Y%m%d%H.log')
+    config['machine']['EGEON']['commands'] = ['cd /work/{cycle:%Y/%m/%d}']
+    return config
+
+
+def cycle_args(parse_args, tmp_path, *argv):
+    return parse_args('--machine', 'EGEON', '--mpi-tasks', '128', '--threads-per-mpi-task', '1',
+                      '--cycle-start', '2020010100', '--cycle-end', '2020010106',
+                      '--output', str(tmp_path / 'gsi_{cycle:%Y%m%d%H}.sh'), *argv)
+
+
+def test_cycle_date_substitution(cycle_config, parse_args, tmp_path):
+    cycles = list(generate_cycle_scripts(cycle_config, cycle_args(parse_args, tmp_path)))
+    assert [filename for _, _, filename in cycles] == [str(tmp_path / 'gsi_2020010100.sh'), str(tmp_path / 'gsi_2020010106.sh')]
+
+    script = cycles[1][1]
+    assert './gsi.exe -cycle 2020010106 > gsiStdout_2020010106.log' in script
+    assert 'cd /work/2020/01/01\n' in script
+    assert 'export CYCLE_DATE=2020010106\n' in script
+    assert 'export PREVIOUS_CYCLE_DATE=2020010100\n' in script
+
+
+def test_scheduler_patterns_are_kept(cycle_config, parse_args, tmp_path):
+    args = cycle_args(parse_args, tmp_path, '--output_file', 'gsi_%j.out', '--error_file', 'gsi_{cycle:%Y%m%d%H}_%j.err')
+    cycle_date, script, filename = next(generate_cycle_scripts(cycle_config, args))
+    assert 'gsi_%j.out\n' in script
+    assert 'gsi_2020010100_%j.err\n' in script
+
+
+def test_output_without_date_mask_is_rejected(cycle_config, parse_args, tmp_path, capsys):
+    args = cycle_args(parse_args, tmp_path)
+    args.output = str(tmp_path / 'gsi.sh')
+    with pytest.raises(SystemExit):
+        next(generate_cycle_scripts(cycle_config, args))
+    assert 'must contain a date mask' in capsys.readouterr().err
+
+
+def test_cycles_share_one_layout_selection(cycle_config, parse_args, tmp_path, monkeypatch):
+    squeue, sinfo = tmp_path / 'squeue.txt', tmp_path / 'sinfo.txt'
+    squeue.write_text("1 RUNNING 10 1:00:00 30:00\n")
+    sinfo.write_text("40 idle\n")
+    loads = []
+    load_queue_simulator = script_generator.load_queue_simulator
+    monkeypatch.setattr(script_generator, 'load_queue_simulator',
+                        lambda *args: loads.append(args) or load_queue_simulator(*args))
+
+    args = cycle_args(parse_args, tmp_path, '--queue-snapshot', str(squeue), '--nodes-snapshot', str(sinfo),
+                      '--wall_clock_limit', '01:00:00', '--cycle-end', '2020010118')
+    cycles = list(generate_cycle_scripts(cycle_config, args))
+
+    assert len(cycles) == 4
+    assert len(loads) == 1
+
+
+@pytest.mark.parametrize('scheduler_type, command, job_id, dependency', [
+    ('SLURM', 'sbatch', '101;cluster', '--parsable --dependency=afterok:101'),
+    ('PBS', 'qsub', '101.sdb', '-W depend=afterok:101.sdb'),
+])
+def test_submission_chain(tmp_path, scheduler_type, command, job_id, dependency):
+    # A fake submission command logs its arguments and prints the job ID.
+    fake = tmp_path / command
+    fake.write_text(f"#!/bin/bash\necho \"$@\" >> {tmp_path / 'log'}\necho '{job_id}'\n")
+    fake.chmod(0o755)
+    submit = tmp_path / 'submit_cycles.sh'
+    submit.write_text(create_cycle_submission_commands(scheduler_type) + "submit a.sh\nsubmit b.sh\n")
+
+    result = subprocess.run(['bash', str(submit)], env={'PATH': f"{tmp_path}:/usr/bin:/bin"},
+                            capture_output=True, text=True, check=True)
+    log = (tmp_path / 'log').read_text().splitlines()
+    assert log[0].split()[-1] == 'a.sh' and 'afterok' not in log[0]
+    assert log[1] == f"{dependency} b.sh"
+    assert result.stdout.splitlines()[-1] == f"b.sh {job_id.split(';')[0]}"
+
+
+def test_submission_chain_stops_at_first_error(tmp_path):
+    fake = tmp_path / 'sbatch'
+    fake.write_text(f"#!/bin/bash\necho \"$@\" >> {tmp_path / 'log'}\nexit 1\n")
+    fake.chmod(0o755)
+    submit = tmp_path / 'submit_cycles.sh'
+    submit.write_text(create_cycle_submission_commands('SLURM') + "submit a.sh\nsubmit b.sh\n")
+
+    result = subprocess.run(['bash', str(submit)], env={'PATH': f"{tmp_path}:/usr/bin:/bin"}, capture_output=True, text=True)
+    assert result.returncode != 0
+    assert len((tmp_path / 'log').read_text().splitlines()) == 1
@@ -0,0 +1,53 @@
+import pytest
+
+from genScheduler.parallel_processing_info import ParallelProcessingInfo
+from genScheduler.script_generator import generate_submission_script, memory_per_task_from_history, parse_memory
+
+
+@pytest.mark.parametrize('value, megabytes', [(512, 512), (0.5, 1), ('4G', 4096), ('512MB', 512), ('1843200K', 1800)])
+def test_parse_memory(value, megabytes):
+    assert parse_memory(value) == megabytes
+
+
+@pytest.mark.parametrize('value', [0, -1, 0.0, '0G', 'lots'])
+def test_parse_memory_rejects_invalid_amounts(value):
+    with pytest.raises(ValueError):
+        parse_memory(value)
+
+
+def test_tasks_per_node_limited_by_cores():
+    info = ParallelProcessingInfo(64, 128, 1, memory_per_node=256000, memory_per_task=1000)
+    assert (info.tasks_per_node, info.nodes, info.memory_request) == (64, 2, 64000)
+
+
+def test_tasks_per_node_limited_by_memory():
+    info = ParallelProcessingInfo(64, 128, 1, memory_per_node=256000, memory_per_task=8000)
+    assert (info.tasks_per_node, info.nodes, info.memory_request) == (32, 4, 256000)
+
+
+def test_task_larger_than_node_is_rejected():
+    with pytest.raises(ValueError):
+        ParallelProcessingInfo(64, 128, 1, memory_per_node=4000, memory_per_task=8000)
+
+
+def test_slurm_requests_memory_per_node(config, parse_args):
+    args = parse_args('--machine', 'EGEON', '--mpi-tasks', '128', '--threads-per-mpi-task', '1',
+                      '--memory-per-node', '256G', '--memory-per-task', '8G')
+    script, filename = generate_submission_script(config, args)
+    # 32 tasks per node fit in memory, so each of the 4 nodes requests 32 x 8 GB.
+    assert '#SBATCH --mem= 262144M\n' in script
+    assert '#SBATCH -N 4\n' in script
+
+
+def test_pbs_requests_memory_for_the_whole_job(config, parse_args):
+    args = parse_args('--machine', 'XC50', '--mpi-tasks', '80', '--threads-per-mpi-task', '1',
+                      '--memory-per-node', '100G', '--memory-per-task', '4G')
+    script, filename = generate_submission_script(config, args)
+    # 25 tasks per node fit in memory, so the 80 tasks need 4 nodes of 25 x 4 GB.
+    assert '#PBS -l mem= 409600mb\n' in script
+
+
+def test_memory_history_skips_headers(tmp_path):
+    history = tmp_path / 'maxrss.txt'
+    history.write_text("    MaxRSS\n----------\n\n  1800000K\n     2.5G\n")
+    assert memory_per_task_from_history(str(history)) == 2816
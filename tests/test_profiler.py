@@ -0,0 +1,72 @@
+import json
+
+from genScheduler import profiler
+from genScheduler.profiler import StageProfiler, profile_stage, profiled, profiling
+
+
+def test_disabled_profiling_is_a_no_op():
+    @profiled('work')
+    def work():
+        return 42
+
+    assert profiler._active_profiler is None
+    assert profile_stage('work') is profiler._disabled
+    assert work() == 42
+
+
+def test_stages_are_recorded_inside_profiling():
+    @profiled('work')
+    def work():
+        return [0] * 1000
+
+    with profiling() as active:
+        work()
+        work()
+        with profile_stage('other'):
+            pass
+    report = active.report()
+
+    assert report['work']['calls'] == 2
+    assert report['work']['mean_ns'] == report['work']['total_ns'] // 2
+    assert set(report['other']) >= {'net_blocks', 'peak_bytes', 'net_bytes'}
+    assert profiler._active_profiler is None
+
+
+def test_nested_stage_does_not_hide_outer_peak():
+    with profiling() as active:
+        with profile_stage('outer'):
+            data = bytearray(4 * 1024 * 1024)
+            del data
+            with profile_stage('inner'):
+                pass
+    report = active.report()
+
+    assert report['outer']['peak_bytes'] >= 4 * 1024 * 1024
+    assert report['inner']['peak_bytes'] < 1024 * 1024
+
+
+def test_outer_stage_includes_inner_peak():
+    with profiling() as active:
+        with profile_stage('outer'):
+            with profile_stage('inner'):
+                data = bytearray(4 * 1024 * 1024)
+                del data
+    report = active.report()
+
+    assert report['inner']['peak_bytes'] >= 4 * 1024 * 1024
+    assert report['outer']['peak_bytes'] >= report['inner']['peak_bytes']
+
+
+def test_runs_are_appended_and_aggregated(tmp_path):
+    report_file = tmp_path / 'profile.jsonl'
+    for elapsed_ns, peak_bytes in ((100, 10), (300, 30)):
+        run = StageProfiler()
+        run.record('render', elapsed_ns, peak_bytes, net_bytes=5, net_blocks=2)
+        run.save(str(report_file))
+
+    lines = report_file.read_text().splitlines()
+    assert len(lines) == 2 and all(json.loads(line) for line in lines)
+
+    report = StageProfiler.load(str(report_file)).report()['render']
+    assert (report['calls'], report['total_ns'], report['min_ns'], report['max_ns'], report['mean_ns']) == (2, 400, 100, 300, 200)
+    assert (report['peak_bytes'], report['net_bytes'], report['net_blocks']) == (30, 10, 4)
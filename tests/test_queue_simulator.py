@@ -0,0 +1,110 @@
+import pytest
+
+from genScheduler.queue_simulator import QueueSimulator, walltime_to_seconds
+from genScheduler.script_generator import candidate_layouts
+
+
+def test_idle_cluster_starts_immediately():
+    simulator = QueueSimulator(total_nodes=10)
+    assert simulator.predict_start(10, 3600) == 0
+
+
+def test_job_waits_for_running_jobs_to_end():
+    simulator = QueueSimulator(total_nodes=10)
+    simulator.add_running(8, 1800)
+    assert simulator.predict_start(4, 3600) == 1800
+
+
+def test_short_job_backfills_before_reservation():
+    # 2 nodes are free now; the queued 10-node job is reserved when the running job ends.
+    simulator = QueueSimulator(total_nodes=10)
+    simulator.add_running(8, 3600)
+    simulator.add_pending(10, 7200)
+    assert simulator.predict_start(2, 3600) == 0
+
+
+def test_long_job_does_not_backfill_into_reservation():
+    simulator = QueueSimulator(total_nodes=10)
+    simulator.add_running(8, 3600)
+    simulator.add_pending(10, 7200)
+    # Running past t=3600 would delay the queued job, so it waits until that job ends.
+    assert simulator.predict_start(2, 3601) == 3600 + 7200
+
+
+def test_job_larger_than_cluster_never_starts():
+    simulator = QueueSimulator(total_nodes=4)
+    assert simulator.predict_start(5, 60) is None
+
+
+def test_from_slurm_skips_unavailable_nodes(tmp_path):
+    sinfo = tmp_path / 'sinfo.txt'
+    sinfo.write_text("10 allocated\n4 idle\n2 down*\n3 drained\n1 maint\n")
+    squeue = tmp_path / 'squeue.txt'
+    squeue.write_text("101 RUNNING 10 2:00:00 1:30:00\n"
+                      "102 PENDING 2 30:00 30:00\n"
+                      "103 PENDING 6 UNLIMITED UNLIMITED\n")
+
+    simulator = QueueSimulator.from_slurm(str(squeue), str(sinfo))
+    assert simulator.total_nodes == 14
+    assert simulator.running == [(10, 5400)]
+    assert simulator.pending == [(2, 1800)]
+    # The queued 2-node job holds 2 of the 4 free nodes until t=1800.
+    assert simulator.predict_start(4, 3600) == 1800
+
+
+def test_from_pbs_reads_columns_from_end_of_line(tmp_path):
+    qstat = tmp_path / 'qstat.txt'
+    qstat.write_text(
+        "                                                            Req'd  Req'd   Elap\n"
+        "Job ID          Username Queue    Jobname    SessID NDS TSK Memory Time  S Time\n"
+        "--------------- -------- -------- ---------- ------ --- --- ------ ----- - -----\n"
+        "1001.sdb        user     batch    gsi run    12345    4 160    --  02:00 R 00:30\n"
+        "1002.sdb        user     batch    bam          --     8 320    --  01:00 Q   --\n"
+        "1003.sdb        user     batch    post         --     2  80    --  00:10 H   --\n")
+
+    simulator = QueueSimulator.from_pbs(str(qstat), total_nodes=10)
+    assert simulator.running == [(4, 5400)]
+    assert simulator.pending == [(8, 3600)]
+
+
+@pytest.mark.parametrize('walltime, scheduler_type, seconds', [
+    ('01:00:00', 'SLURM', 3600),
+    ('30', 'SLURM', 1800),
+    (60, 'SLURM', 3600),
+    (3600, 'PBS', 3600),
+    ('3600', 'PBS', 3600),
+    ('10:00', 'PBS', 600),
+    ('2-12', 'SLURM', 216000),
+    ('1-00:30', 'SLURM', 88200),
+])
+def test_walltime_to_seconds(walltime, scheduler_type, seconds):
+    assert walltime_to_seconds(walltime, scheduler_type) == seconds
+
+
+def test_requested_layout_kept_when_nothing_finishes_earlier():
+    simulator = QueueSimulator(total_nodes=100)
+    candidates = candidate_layouts(64, 128, 1, 3600, [0.5, 1.0, 2.0])
+    layout, walltime, start = simulator.choose_layout(candidates)
+    assert (layout.mpi_tasks, walltime, start) == (128, 3600, 0)
+
+
+@pytest.mark.parametrize('scaling_exponent', [None, 0.5, 1.0])
+def test_downsized_candidates_get_more_time(scaling_exponent):
+    candidates = candidate_layouts(64, 256, 1, 3600, [0.25, 0.5, 1.0, 2.0], scaling_exponent=scaling_exponent)
+    for layout, walltime in candidates:
+        if layout.mpi_tasks < 256:
+            assert walltime > 3600
+
+
+def test_downsized_candidate_does_not_win_on_busy_queue_without_model():
+    # 38 of 40 nodes are busy for an hour: half the tasks start now but need twice the time.
+    simulator = QueueSimulator(total_nodes=40)
+    simulator.add_running(38, 3600)
+    layout, walltime, start = simulator.choose_layout(candidate_layouts(64, 256, 1, 3600, [0.5, 1.0, 2.0]))
+    assert layout.mpi_tasks * walltime >= 256 * 3600
+
+
+def test_candidates_capped_at_queue_walltime():
+    candidates = candidate_layouts(64, 128, 1, 3600, [0.5, 1.0, 2.0], scaling_exponent=1.0, max_walltime=3600)
+    assert sorted(layout.mpi_tasks for layout, walltime in candidates) == [128, 256]
+
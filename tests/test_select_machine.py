@@ -0,0 +1,70 @@
+import pytest
+
+from genScheduler.script_generator import select_machine
+
+
+def make_config(**machines):
+    return {'scheduler': {'directives': {'wall_clock_limit': '02:00:00'}, 'extraInfo': {'exec': 'gsi.exe -cycle 2020010100'}},
+            'machine': machines}
+
+
+def machine(**entries):
+    return dict({'scheduler': 'SLURM', 'max_cores_per_node': 64, 'assumed_wait': '00:30:00'}, **entries)
+
+
+@pytest.fixture
+def args(parse_args):
+    return parse_args('--machine', 'auto', '--mpi-tasks', '128', '--threads-per-mpi-task', '1')
+
+
+def test_faster_machine_wins(args):
+    config = make_config(SLOW=machine(), FAST=machine(speed_factor=2.0))
+    assert select_machine(config, args) == ('FAST', 'SLURM', 3600)
+
+
+def test_runtime_history_overrides_speed_factor(args, tmp_path):
+    history = tmp_path / 'elapsed.txt'
+    history.write_text("   Elapsed\n----------\n  00:20:00\n  00:25:00\n  03:00:00\n")
+    config = make_config(FAST=machine(speed_factor=2.0), KNOWN=machine(runtime_history=str(history)))
+    # The median runtime (25 minutes) beats the hour predicted by the speed factor; the
+    # wall clock limit is kept, since it already covers the runtime.
+    assert select_machine(config, args) == ('KNOWN', 'SLURM', 7200)
+
+
+def test_wall_clock_limit_raised_to_cover_history(args, tmp_path):
+    history = tmp_path / 'elapsed.txt'
+    history.write_text("03:00:00\n")
+    config = make_config(ONLY=machine(runtime_history=str(history)))
+    assert select_machine(config, args) == ('ONLY', 'SLURM', 10800)
+
+
+def test_queue_wait_is_required(args, capsys):
+    config = make_config(UNKNOWN=machine(assumed_wait=None), KNOWN=machine(assumed_wait='02:00:00'))
+    assert select_machine(config, args)[0] == 'KNOWN'
+    assert "Machine UNKNOWN not eligible: no 'queue_snapshot' or 'assumed_wait'" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('entries, reason', [
+    ({'scheduler': None}, 'scheduler or maximum cores per node not defined'),
+    ({'modules': ['netcdf']}, 'missing modules openmpi4'),
+    ({'executables': ['bam.exe']}, 'executable gsi.exe not available'),
+    ({'memory_per_node': '16G'}, 'exceeds memory per node'),
+    ({'tuning_profile': 'latency'}, "Tuning profile 'latency' is not defined"),
+    ({'max_wall_clock_limit': '01:00:00'}, 'exceeds the queue maximum'),
+])
+def test_ineligible_machines_are_reported(args, capsys, tmp_path, entries, reason):
+    # A task needs 22 GB, from the memory history, so it does not fit in 16 GB nodes.
+    history = tmp_path / 'maxrss.txt'
+    history.write_text("MaxRSS\n20G\n")
+    config = make_config(GOOD=machine(modules=['openmpi4/4.1.1'], memory_per_node='256G'),
+                         BAD=dict(machine(modules=['openmpi4/4.1.1'], memory_per_node='256G'), **entries))
+    config['scheduler']['extraInfo'].update(required_modules=['openmpi4'], memory_history=str(history))
+    assert select_machine(config, args)[0] == 'GOOD'
+    err = capsys.readouterr().err
+    assert 'Machine BAD not eligible: ' in err and reason in err
+    assert 'Machine GOOD not eligible' not in err
+
+
+def test_no_eligible_machine(args):
+    with pytest.raises(ValueError):
+        select_machine(make_config(NONE=machine(assumed_wait=None)), args)
@@ -0,0 +1,61 @@
+import pytest
+
+from genScheduler.script_generator import (generate_submission_script, merge_exports, merge_launcher_options,
+                                           merge_modules, resolve_tuning_profile)
+
+
+def test_merge_exports_overrides_in_place():
+    merged = merge_exports([{'OMP_NUM_THREADS': 1}, {'UCX_TLS': 'rc'}], [{'OMP_NUM_THREADS': 4}, {'FI_PROVIDER': 'cxi'}])
+    assert merged == [{'OMP_NUM_THREADS': 4}, {'UCX_TLS': 'rc'}, {'FI_PROVIDER': 'cxi'}]
+
+
+def test_merge_modules_keeps_load_order():
+    merged = merge_modules(['gcc/12', 'openmpi4/4.1.1', 'netcdf'], ['openmpi4/4.1.4', 'craype-hugepages2M'])
+    assert merged == ['gcc/12', 'openmpi4/4.1.4', 'netcdf', 'craype-hugepages2M']
+
+
+def test_merge_modules_drops_duplicate_versions():
+    assert merge_modules(['hdf5/1.12', 'netcdf', 'hdf5/1.10'], ['hdf5/1.14']) == ['hdf5/1.14', 'netcdf']
+
+
+def test_merge_launcher_options_replaces_by_name():
+    merged = merge_launcher_options(['--cpu-freq=High', '--hint nomultithread'], ['--cpu-freq=Medium', '--hint=multithread'])
+    assert merged == ['--cpu-freq=Medium', '--hint=multithread']
+
+
+@pytest.fixture
+def tuning_config(config):
+    config['tuning_profiles'] = {'latency': {'version': 1, 'export': [{'UCX_TLS': 'all'}, {'MPICH_ASYNC_PROGRESS': 1}],
+                                             'launcher_options': ['--cpu-freq=Low']}}
+    config['machine']['EGEON']['tuning_profiles']['latency']['applications'] = {
+        'gsi.exe': {'version': 3, 'export': [{'OMP_STACKSIZE': '1G'}], 'modules': ['openmpi4/4.1.4']}}
+    return config
+
+
+def test_tuning_profile_precedence(tuning_config):
+    profile = resolve_tuning_profile(tuning_config, 'EGEON', 'gsi.exe', 'latency')
+    # Application over machine over shared profile.
+    assert profile['version'] == 3
+    assert profile['export'] == [{'UCX_TLS': 'rc,sm'}, {'MPICH_ASYNC_PROGRESS': 1}, {'OMP_STACKSIZE': '1G'}]
+    assert profile['modules'] == ['openmpi4/4.1.4']
+    assert profile['launcher_options'] == ['--cpu-freq=High']
+
+
+def test_tuning_profile_without_application_level(tuning_config):
+    profile = resolve_tuning_profile(tuning_config, 'EGEON', 'bam.exe', 'latency')
+    assert profile['version'] == 1
+    assert {'OMP_STACKSIZE': '512M'} in profile['export']
+
+
+def test_undefined_tuning_profile_is_rejected(tuning_config):
+    with pytest.raises(ValueError):
+        resolve_tuning_profile(tuning_config, 'XC50', 'gsi.exe', 'throughput')
+
+
+def test_application_profile_applies_to_exec_with_arguments(tuning_config, parse_args):
+    tuning_config['scheduler']['extraInfo']['exec'] = 'bin/gsi.exe -cycle {cycle:%Y%m%d%H}'
+    args = parse_args('--machine', 'EGEON', '--mpi-tasks', '128', '--threads-per-mpi-task', '1', '--tuning-profile', 'latency')
+    script, filename = generate_submission_script(tuning_config, args)
+    assert 'export OMP_STACKSIZE=1G' in script
+    assert 'openmpi4/4.1.4' in script and 'openmpi4/4.1.1' not in script
+    assert '# Tuning profile: latency (version 3)' in script